@@ -30,4 +30,4 @@ echo "Abrindo o navegador em http://127.0.0.1:8000 ..."
   fi
 ) &
 
-exec python -m uvicorn pdf2epub_qa.api:app --host 127.0.0.1 --port 8000 --reload
+exec python -m pdf2epub_qa.server
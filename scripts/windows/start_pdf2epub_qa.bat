@@ -23,6 +23,6 @@ powershell -NoExit -ExecutionPolicy Bypass -Command ^
   "Write-Host 'Ambiente local ativado.' -ForegroundColor Green;" ^
   "Write-Host 'Abrindo o navegador em http://127.0.0.1:8000 ...' -ForegroundColor Cyan;" ^
   "Start-Process 'http://127.0.0.1:8000/';" ^
-  "python -m uvicorn pdf2epub_qa.api:app --host 127.0.0.1 --port 8000 --reload"
+  "python -m pdf2epub_qa.server"
 
 endlocal
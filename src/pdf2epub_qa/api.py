@@ -1,47 +1,267 @@
 ﻿from __future__ import annotations
 
-import json
+import asyncio
+import contextlib
+import functools
+import hashlib
+import itertools
+import mmap
+import multiprocessing
 import os
+import queue
+import random
 import re
 import shutil
 import tempfile
+import time
 import unicodedata
 import zipfile
-from datetime import datetime
+from collections.abc import Callable, Iterator
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from uuid import uuid4
-
-from fastapi import BackgroundTasks, FastAPI, File, Form, UploadFile
-from fastapi.responses import FileResponse, HTMLResponse, JSONResponse
+from typing import Any, BinaryIO, TypeVar
+
+import orjson
+from fastapi import BackgroundTasks, FastAPI, File, Form, Request, UploadFile
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import (
+    FileResponse,
+    HTMLResponse,
+    JSONResponse,
+    Response,
+    StreamingResponse,
+)
 from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.staticfiles import NotModifiedResponse
+from starlette.types import Receive, Scope, Send
 
-from .batch import convert_pdfs_batch
-from .converter import convert_pdf_to_epub
-from .qa import review_pdf_epub
 from .reporting import build_user_summary
+from .utils import SERVER_WORKERS_ENV, single_render_worker, write_json
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+COPY_RANGE_SIZE = 64 * 1024 * 1024
+UPLOAD_SAVE_WORKERS = 8
+# Readers accept the %PDF- header anywhere in the first KiB, so peek that far.
+PDF_MAGIC = b"%PDF-"
+PDF_MAGIC_WINDOW = 1024
+REPORT_ISSUES_CHUNK = 1000
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+# Below this, mapping costs more than ZipFile's plain buffered copy.
+ZIP_MMAP_MIN_SIZE = 64 * 1024
+ZIP_WRITE_CHUNK_SIZE = 1024 * 1024
+_UNSAFE_STEM_RE = re.compile(r"[^a-zA-Z0-9._-]+")
+# Latin-1 + Latin Extended-A/B folded to ASCII once, so common accented names skip NFKD.
+_ASCII_FOLD = {
+    cp: unicodedata.normalize("NFKD", chr(cp)).encode("ascii", "ignore").decode("ascii") or None
+    for cp in range(0x80, 0x250)
+}
 
 OUTPUT_DIR = Path(os.getenv("PDF2EPUB_QA_OUTPUT_DIR", str(Path.cwd() / "outputs")))
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
-app = FastAPI(title="pdf2epub-qa")
-app.mount("/outputs", StaticFiles(directory=str(OUTPUT_DIR)), name="outputs")
+_T = TypeVar("_T")
+# pid + per-process counter keeps output prefixes unique across server workers without
+# drawing entropy per request; the random start avoids reuse after a quick restart.
+_PID = os.getpid()
+_RUN_COUNTER = itertools.count(random.getrandbits(24))
+# Conversion and QA are CPU-bound; run them in worker processes shared by all requests.
+_PROCESS_POOL: ProcessPoolExecutor | None = None
+
+# Scratch dirs for /convert and /review are recycled instead of mkdtemp + rmtree per request.
+_WORK_DIRS: queue.SimpleQueue[Path] = queue.SimpleQueue()
+
+
+JSON_MEDIA_TYPE = "application/json; charset=utf-8"
+
+
+# One per PDF in the batch report; orjson serializes slotted dataclasses natively.
+@dataclass(slots=True)
+class BatchResultRow:
+    input_name: str
+    status: str
+    error: str | None
+    pages: int | None
+    images: int | None
+    sections: int | None
+    output_epub_name: str | None
+    output_epub_url: str | None
+
+
+class ORJSONResponse(JSONResponse):
+    media_type = JSON_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+class LargeFileResponse(FileResponse):
+    # EPUBs and ZIPs are multi-MB; Starlette's 64 KiB default means many small reads.
+    chunk_size = DOWNLOAD_CHUNK_SIZE
+
+
+class OutputFiles(StaticFiles):
+    def file_response(
+        self,
+        full_path: str | os.PathLike[str],
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        response = LargeFileResponse(full_path, status_code=status_code, stat_result=stat_result)
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+class ReportGZipMiddleware(GZipMiddleware):
+    # EPUB and ZIP bodies are already deflated; only JSON and HTML are worth compressing.
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        path = scope.get("path", "")
+        if path == "/convert" or (path.startswith("/outputs/") and not path.endswith(".json")):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
+app = FastAPI(title="pdf2epub-qa", default_response_class=ORJSONResponse)
+app.add_middleware(ReportGZipMiddleware, minimum_size=1024, compresslevel=6)
+app.mount("/outputs", OutputFiles(directory=str(OUTPUT_DIR)), name="outputs")
+
+
+def _copy_stream(source: BinaryIO, dest: BinaryIO) -> None:
+    # readinto reuses one buffer instead of allocating a fresh bytes object per chunk.
+    buffer = bytearray(UPLOAD_CHUNK_SIZE)
+    view = memoryview(buffer)
+    while size := source.readinto(buffer):
+        dest.write(view[:size])
+
+
+def _copy_file_range(source: BinaryIO, dest_fd: int) -> bool:
+    # Uploads spooled to disk can be copied in-kernel; in-memory ones have no name and no fd.
+    if not hasattr(os, "copy_file_range") or getattr(source, "name", None) is None:
+        return False
+    src_fd = source.fileno()
+    offset = source.tell()
+    try:
+        while copied := os.copy_file_range(src_fd, dest_fd, COPY_RANGE_SIZE, offset_src=offset):
+            offset += copied
+    except OSError:
+        os.lseek(dest_fd, 0, os.SEEK_SET)
+        os.ftruncate(dest_fd, 0)
+        return False
+    return True
 
 
 def _save_upload(upload: UploadFile, target: Path) -> None:
-    with target.open("wb") as f:
-        f.write(upload.file.read())
+    # Publish via rename so a crash mid-upload never leaves a truncated file under its name.
+    fd, part_name = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.", suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            if not _copy_file_range(upload.file, f.fileno()):
+                _copy_stream(upload.file, f)
+        os.replace(part_name, target)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(part_name)
+        raise
+
+
+def _pool_workers() -> int:
+    # Every uvicorn worker owns a pool; together they get one process per core.
+    server_workers = max(1, int(os.getenv(SERVER_WORKERS_ENV, "1")))
+    return max(1, (os.cpu_count() or 2) // server_workers)
+
+
+def _process_pool() -> ProcessPoolExecutor:
+    global _PROCESS_POOL
+    if _PROCESS_POOL is None:
+        # Spawn, not fork: by the first request the server already runs threads
+        # (to_thread workers, the upload pool), and forking them can deadlock the child.
+        _PROCESS_POOL = ProcessPoolExecutor(
+            max_workers=_pool_workers(),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=single_render_worker,
+        )
+    return _PROCESS_POOL
 
 
+async def _run_in_process(func: Callable[..., _T], *args: Any, **kwargs: Any) -> _T:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_process_pool(), functools.partial(func, *args, **kwargs))
+
+
+def _acquire_work_dir() -> Path:
+    try:
+        return _WORK_DIRS.get_nowait()
+    except queue.Empty:
+        return Path(tempfile.mkdtemp(prefix="pdf2epub-qa-"))
+
+
+def _release_work_dir(work_dir: Path, *files: Path) -> None:
+    # Endpoints pass the files they created, which skips the directory scan.
+    try:
+        for entry in files or work_dir.iterdir():
+            entry.unlink(missing_ok=True)
+    except OSError:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        return
+    _WORK_DIRS.put(work_dir)
+
+
+def _iter_report_json(report: dict) -> Iterator[bytes]:
+    # Per-page issues dominate large reports; emit them in slices instead of one buffer.
+    issues = report.get("issues", [])
+    head = orjson.dumps(
+        {key: value for key, value in report.items() if key != "issues"},
+        option=orjson.OPT_NON_STR_KEYS,
+    )
+    yield head[:-1]
+    yield b'"issues":[' if head == b"{}" else b',"issues":['
+    for start in range(0, len(issues), REPORT_ISSUES_CHUNK):
+        if start:
+            yield b","
+        chunk = issues[start : start + REPORT_ISSUES_CHUNK]
+        yield orjson.dumps(chunk, option=orjson.OPT_NON_STR_KEYS)[1:-1]
+    yield b"]}"
+
+
+def _has_pdf_magic(upload: UploadFile) -> bool:
+    head = upload.file.read(PDF_MAGIC_WINDOW)
+    upload.file.seek(0)
+    return PDF_MAGIC in head
+
+
+@functools.lru_cache(maxsize=4096)
 def _safe_stem(file_name: str) -> str:
     stem = Path(file_name).stem
-    stem = unicodedata.normalize("NFKD", stem).encode("ascii", "ignore").decode("ascii")
-    stem = re.sub(r"[^a-zA-Z0-9._-]+", "-", stem).strip("-")
+    if not stem.isascii():
+        stem = stem.translate(_ASCII_FOLD)
+        if not stem.isascii():
+            stem = unicodedata.normalize("NFKD", stem)
+        stem = stem.encode("ascii", "ignore").decode("ascii")
+    stem = _UNSAFE_STEM_RE.sub("-", stem).strip("-")
     return stem or "arquivo"
 
 
-def _output_url(path: Path) -> str:
-    rel = path.resolve().relative_to(OUTPUT_DIR.resolve())
-    return "/outputs/" + "/".join(rel.parts)
+def _run_token() -> str:
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{_PID:x}-{next(_RUN_COUNTER):x}"
+
+
+@functools.lru_cache(maxsize=8)
+def _output_root(output_dir: Path) -> str:
+    return os.path.join(os.path.abspath(output_dir), "")
+
+
+def _output_url(path: str | Path) -> str:
+    # Every output path is built under OUTPUT_DIR, so a string prefix check replaces
+    # the two realpath() walks Path.resolve() would do per file.
+    root = _output_root(OUTPUT_DIR)
+    abs_path = os.path.abspath(path)
+    if not abs_path.startswith(root):
+        raise ValueError(f"{path} is not inside {OUTPUT_DIR}")
+    return "/outputs/" + abs_path[len(root) :].replace(os.sep, "/")
 
 
 def _save_batch_uploads(
@@ -51,27 +271,76 @@ def _save_batch_uploads(
     saved_paths: list[Path] = []
     original_name_by_saved: dict[str, str] = {}
     used_names: set[str] = set()
+    # Next suffix to try per lowercased stem, so repeated names do not rescan from -1.
+    next_suffix: dict[str, int] = {}
+    pending: list[tuple[UploadFile, Path]] = []
 
     for upload in pdfs:
         original_name = upload.filename or "input.pdf"
-        if not original_name.lower().endswith(".pdf"):
+        # Peek at the header so renamed non-PDFs are dropped before any bytes hit disk.
+        if not original_name.lower().endswith(".pdf") or not _has_pdf_magic(upload):
             continue
         safe_stem = _safe_stem(original_name)
-        candidate = f"{safe_stem}.pdf"
-        idx = 1
-        while candidate.lower() in used_names:
-            candidate = f"{safe_stem}-{idx}.pdf"
+        lower_stem = safe_stem.lower()
+        idx = next_suffix.get(lower_stem, 0)
+        while (key := f"{lower_stem}-{idx}.pdf" if idx else f"{lower_stem}.pdf") in used_names:
             idx += 1
-        used_names.add(candidate.lower())
+        next_suffix[lower_stem] = idx + 1
+        used_names.add(key)
+        candidate = f"{safe_stem}-{idx}.pdf" if idx else f"{safe_stem}.pdf"
 
         target = input_dir / candidate
-        _save_upload(upload, target)
+        pending.append((upload, target))
         saved_paths.append(target)
         original_name_by_saved[str(target)] = original_name
 
+    # Names are resolved above in order; only the disk writes fan out.
+    if pending:
+        with ThreadPoolExecutor(max_workers=min(UPLOAD_SAVE_WORKERS, len(pending))) as pool:
+            list(pool.map(lambda pair: _save_upload(*pair), pending))
+
     return saved_paths, original_name_by_saved
 
 
+def _write_zip_member(zf: zipfile.ZipFile, path: Path) -> None:
+    zinfo = zipfile.ZipInfo.from_file(path, arcname=path.name)
+    if zinfo.file_size < ZIP_MMAP_MIN_SIZE:
+        zf.write(path, arcname=path.name)
+        return
+    zinfo.compress_type = zipfile.ZIP_STORED
+    # Feed the page cache straight into the archive instead of copying through read() buffers.
+    with (
+        open(path, "rb") as src,
+        mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ) as mapped,
+        zf.open(zinfo, "w") as dest,
+    ):
+        view = memoryview(mapped)
+        try:
+            for start in range(0, len(view), ZIP_WRITE_CHUNK_SIZE):
+                dest.write(view[start : start + ZIP_WRITE_CHUNK_SIZE])
+        finally:
+            view.release()
+
+
+def _zip_epubs(epub_dir: Path, zip_path: Path) -> bool:
+    with os.scandir(epub_dir) as entries:
+        epub_files = sorted(
+            Path(entry.path)
+            for entry in entries
+            if entry.name.endswith(".epub") and entry.is_file(follow_symlinks=False)
+        )
+    if not epub_files:
+        return False
+    # Built after the response is sent: publish via rename so the UI never sees a partial ZIP.
+    part_path = zip_path.with_name(f".{zip_path.name}.part")
+    # EPUBs are already deflated ZIP containers; storing them avoids recompressing for ~0% gain.
+    with zipfile.ZipFile(part_path, "w", compression=zipfile.ZIP_STORED, allowZip64=True) as zf:
+        for epub_file in epub_files:
+            _write_zip_member(zf, epub_file)
+    os.replace(part_path, zip_path)
+    return True
+
+
 def _batch_status(success_count: int, failed_count: int) -> str:
     if failed_count == 0:
         return "ok"
@@ -80,9 +349,7 @@ def _batch_status(success_count: int, failed_count: int) -> str:
     return "erro"
 
 
-@app.get("/", response_class=HTMLResponse)
-async def ui() -> HTMLResponse:
-    html = """
+_UI_HTML = """
 <!doctype html>
 <html lang="pt-BR">
   <head>
@@ -351,6 +618,21 @@ async def ui() -> HTMLResponse:
         el.textContent = message;
       }
 
+      async function waitForFile(link, url, label) {
+        link.removeAttribute("href");
+        link.textContent = "Preparando EPUBs (.zip)...";
+        for (let attempt = 0; attempt < 300; attempt++) {
+          const response = await fetch(url, { method: "HEAD" });
+          if (response.ok) {
+            link.href = url;
+            link.textContent = label;
+            return;
+          }
+          await new Promise((resolve) => setTimeout(resolve, 1000));
+        }
+        link.textContent = "ZIP indisponivel. Use o relatorio do lote.";
+      }
+
       function chipClass(status) {
         if (status === "excelente" || status === "ok") return "chip ok";
         if (status === "bom" || status === "parcial") return "chip warn";
@@ -419,7 +701,7 @@ async def ui() -> HTMLResponse:
             <span class="chip">imagens: ${s.imagens_pdf}/${s.imagens_epub}</span>
           `;
 
-          singleSummary.textContent = renderSimpleSummary(payload.client_report);
+          singleSummary.textContent = renderSimpleSummary(s);
           singleResult.style.display = "block";
         } catch (err) {
           showStatus(singleStatus, err.message || "Erro inesperado.", "#fef3f2", "#b42318");
@@ -448,8 +730,8 @@ async def ui() -> HTMLResponse:
 
           showStatus(batchStatus, "Lote finalizado.", "#ecfdf3", "#067647");
           if (payload.files.zip_download_url) {
-            batchZipLink.href = payload.files.zip_download_url;
             batchZipLink.style.display = "inline-block";
+            waitForFile(batchZipLink, payload.files.zip_download_url, "Baixar EPUBs (.zip)");
           } else {
             batchZipLink.style.display = "none";
           }
@@ -477,33 +759,48 @@ async def ui() -> HTMLResponse:
   </body>
 </html>
 """
-    return HTMLResponse(content=html)
+_UI_HTML_BYTES = _UI_HTML.encode("utf-8")
+_UI_ETAG = f'"{hashlib.blake2b(_UI_HTML_BYTES, digest_size=8).hexdigest()}"'
+_UI_HEADERS = {"Cache-Control": "public, max-age=3600", "ETag": _UI_ETAG}
+
+
+@app.get("/", response_class=HTMLResponse)
+async def ui(request: Request) -> Response:
+    if_none_match = request.headers.get("if-none-match", "")
+    if any(tag.strip().removeprefix("W/") in (_UI_ETAG, "*") for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=_UI_HEADERS)
+    return HTMLResponse(content=_UI_HTML_BYTES, headers=_UI_HEADERS)
 
 
 @app.post("/convert-and-review")
 async def convert_and_review_endpoint(
+    background_tasks: BackgroundTasks,
     pdf: UploadFile = File(...),
     title: str | None = Form(None),
     author: str | None = Form(None),
     lang: str = Form("pt-BR"),
     layout: str = Form("fixed"),
-) -> JSONResponse:
+    pretty: bool = False,
+) -> ORJSONResponse:
+    # Conversion modules pull in PyMuPDF/EbookLib; import them on first use, not at startup.
+    from .converter import convert_pdf_to_epub
+    from .qa import review_pdf_epub
+
     input_name = pdf.filename or "input.pdf"
-    if not input_name.lower().endswith(".pdf"):
-        return JSONResponse(status_code=400, content={"error": "Envie um arquivo .pdf valido."})
+    if not input_name.lower().endswith(".pdf") or not _has_pdf_magic(pdf):
+        return ORJSONResponse(status_code=400, content={"error": "Envie um arquivo .pdf valido."})
 
     base_name = _safe_stem(input_name)
-    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
-    token = uuid4().hex[:8]
-    prefix = f"{base_name}-{stamp}-{token}"
+    prefix = f"{base_name}-{_run_token()}"
 
     pdf_path = OUTPUT_DIR / f"{prefix}.pdf"
     epub_path = OUTPUT_DIR / f"{prefix}.epub"
     report_path = OUTPUT_DIR / f"{prefix}.report.json"
 
     try:
-        _save_upload(pdf, pdf_path)
-        convert_pdf_to_epub(
+        await asyncio.to_thread(_save_upload, pdf, pdf_path)
+        await _run_in_process(
+            convert_pdf_to_epub,
             pdf_path=pdf_path,
             output_path=epub_path,
             title=title,
@@ -511,14 +808,13 @@ async def convert_and_review_endpoint(
             lang=lang,
             layout_mode=layout,
         )
-        report = review_pdf_epub(pdf_path, epub_path)
-        report_path.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        report = await _run_in_process(review_pdf_epub, pdf_path, epub_path)
     except RuntimeError as exc:
-        return JSONResponse(status_code=400, content={"error": str(exc)})
+        return ORJSONResponse(status_code=400, content={"error": str(exc)})
     except Exception as exc:
-        return JSONResponse(status_code=500, content={"error": f"Falha interna: {exc}"})
+        return ORJSONResponse(status_code=500, content={"error": f"Falha interna: {exc}"})
 
-    client_report = build_user_summary(report)
+    summary = build_user_summary(report)
     response = {
         "ok": True,
         "files": {
@@ -529,31 +825,35 @@ async def convert_and_review_endpoint(
             "epub_download_url": _output_url(epub_path),
             "report_download_url": _output_url(report_path),
         },
-        "summary": client_report,
-        "client_report": client_report,
+        "summary": summary,
     }
-    return JSONResponse(content=response)
+    # The download link is only followed after the page renders, so the write can trail it.
+    # Reports written by the API are compact unless ?pretty=1 asks for indentation.
+    background_tasks.add_task(write_json, report_path, report, pretty=pretty)
+    return ORJSONResponse(content=response, background=background_tasks)
 
 
 @app.post("/batch-convert-upload")
 async def batch_convert_upload_endpoint(
+    background_tasks: BackgroundTasks,
     pdfs: list[UploadFile] = File(...),
     lang: str = Form("pt-BR"),
     layout: str = Form("reflow"),
     workers: int = Form(2),
     author: str | None = Form(None),
-) -> JSONResponse:
+    pretty: bool = False,
+) -> ORJSONResponse:
+    from .batch import convert_pdfs_batch
+
     if layout not in {"reflow", "fixed"}:
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=400, content={"error": "layout invalido. Use reflow ou fixed."}
         )
 
     max_workers = max(1, min(8, os.cpu_count() or 2))
     workers = max(1, min(int(workers), max_workers))
 
-    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
-    token = uuid4().hex[:8]
-    run_dir = OUTPUT_DIR / f"batch-{stamp}-{token}"
+    run_dir = OUTPUT_DIR / f"batch-{_run_token()}"
     input_dir = run_dir / "inputs"
     epub_dir = run_dir / "epubs"
     report_path = run_dir / "batch-report.json"
@@ -561,14 +861,19 @@ async def batch_convert_upload_endpoint(
     zip_path = run_dir / "batch-epubs.zip"
 
     try:
-        saved_paths, original_name_by_saved = _save_batch_uploads(pdfs, input_dir)
+        saved_paths, original_name_by_saved = await asyncio.to_thread(
+            _save_batch_uploads, pdfs, input_dir
+        )
         if not saved_paths:
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=400,
                 content={"error": "Nenhum PDF valido enviado. Selecione arquivos .pdf."},
             )
 
-        report = convert_pdfs_batch(
+        # Runs on the shared process pool: a pool per request would add its own processes
+        # (and spawn start-up) on top of the one-per-core limit.
+        report = await asyncio.to_thread(
+            convert_pdfs_batch,
             input_paths=saved_paths,
             output_dir=epub_dir,
             workers=workers,
@@ -576,25 +881,26 @@ async def batch_convert_upload_endpoint(
             lang=lang,
             layout_mode=layout,
             author=author,
+            pool=_process_pool(),
         )
 
-        result_items: list[dict] = []
+        result_items: list[BatchResultRow] = []
         failed_names: list[str] = []
         for item in report["results"]:
             original_name = original_name_by_saved.get(
                 item["input_pdf"], Path(item["input_pdf"]).name
             )
             ok = item["status"] == "ok"
-            row = {
-                "input_name": original_name,
-                "status": item["status"],
-                "error": item["error"],
-                "pages": item["pages"],
-                "images": item["images"],
-                "sections": item["sections"],
-                "output_epub_name": Path(item["output_epub"]).name if ok else None,
-                "output_epub_url": _output_url(Path(item["output_epub"])) if ok else None,
-            }
+            row = BatchResultRow(
+                input_name=original_name,
+                status=item["status"],
+                error=item["error"],
+                pages=item["pages"],
+                images=item["images"],
+                sections=item["sections"],
+                output_epub_name=os.path.basename(item["output_epub"]) if ok else None,
+                output_epub_url=_output_url(item["output_epub"]) if ok else None,
+            )
             result_items.append(row)
             if not ok:
                 failed_names.append(original_name)
@@ -613,25 +919,19 @@ async def batch_convert_upload_endpoint(
             "failed_input_names": failed_names,
             "results": result_items,
         }
-        report_path.write_text(
-            json.dumps(api_report, ensure_ascii=False, indent=2), encoding="utf-8"
-        )
+        await asyncio.to_thread(write_json, report_path, api_report, pretty=pretty)
 
         retry_data = {
             "failed_input_names": failed_names,
             "failed_count": len(failed_names),
             "message": "Reenvie apenas estes PDFs no modo de lote para tentar novamente.",
         }
-        retry_path.write_text(
-            json.dumps(retry_data, ensure_ascii=False, indent=2), encoding="utf-8"
-        )
+        await asyncio.to_thread(write_json, retry_path, retry_data, pretty=pretty)
 
-        epub_files = sorted(epub_dir.glob("*.epub"))
         zip_url = None
-        if epub_files:
-            with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
-                for epub_file in epub_files:
-                    zf.write(epub_file, arcname=epub_file.name)
+        if report["success_count"] > 0:
+            # The EPUBs are already downloadable one by one; the ZIP can trail the response.
+            background_tasks.add_task(_zip_epubs, epub_dir, zip_path)
             zip_url = _output_url(zip_path)
 
         summary = {
@@ -662,12 +962,12 @@ async def batch_convert_upload_endpoint(
                 "retry_download_url": _output_url(retry_path),
             },
         }
-        return JSONResponse(content=response)
+        return ORJSONResponse(content=response, background=background_tasks)
 
     except RuntimeError as exc:
-        return JSONResponse(status_code=400, content={"error": str(exc)})
+        return ORJSONResponse(status_code=400, content={"error": str(exc)})
     except Exception as exc:
-        return JSONResponse(status_code=500, content={"error": f"Falha interna: {exc}"})
+        return ORJSONResponse(status_code=500, content={"error": f"Falha interna: {exc}"})
 
 
 @app.post("/convert")
@@ -679,13 +979,18 @@ async def convert_endpoint(
     lang: str = Form("pt-BR"),
     layout: str = Form("reflow"),
 ):
-    tmpdir = Path(tempfile.mkdtemp())
+    from .converter import convert_pdf_to_epub
+
+    if not _has_pdf_magic(pdf):
+        return ORJSONResponse(status_code=400, content={"error": "Envie um arquivo .pdf valido."})
+    tmpdir = _acquire_work_dir()
     pdf_path = tmpdir / "input.pdf"
     epub_path = tmpdir / "output.epub"
-    _save_upload(pdf, pdf_path)
+    await asyncio.to_thread(_save_upload, pdf, pdf_path)
 
     try:
-        convert_pdf_to_epub(
+        await _run_in_process(
+            convert_pdf_to_epub,
             pdf_path,
             epub_path,
             title=title,
@@ -694,10 +999,10 @@ async def convert_endpoint(
             layout_mode=layout,
         )
     except RuntimeError as exc:
-        background_tasks.add_task(shutil.rmtree, tmpdir, ignore_errors=True)
-        return JSONResponse(status_code=400, content={"error": str(exc)})
-    background_tasks.add_task(shutil.rmtree, tmpdir, ignore_errors=True)
-    return FileResponse(
+        background_tasks.add_task(_release_work_dir, tmpdir, pdf_path, epub_path)
+        return ORJSONResponse(status_code=400, content={"error": str(exc)})
+    background_tasks.add_task(_release_work_dir, tmpdir, pdf_path, epub_path)
+    return LargeFileResponse(
         epub_path,
         media_type="application/epub+zip",
         filename="output.epub",
@@ -711,16 +1016,24 @@ async def review_endpoint(
     pdf: UploadFile = File(...),
     epub_file: UploadFile = File(..., alias="epub"),
 ):
-    tmpdir = Path(tempfile.mkdtemp())
+    from .qa import review_pdf_epub
+
+    if not _has_pdf_magic(pdf):
+        return ORJSONResponse(status_code=400, content={"error": "Envie um arquivo .pdf valido."})
+    tmpdir = _acquire_work_dir()
     pdf_path = tmpdir / "input.pdf"
     epub_path = tmpdir / "input.epub"
-    _save_upload(pdf, pdf_path)
-    _save_upload(epub_file, epub_path)
+    await asyncio.to_thread(_save_upload, pdf, pdf_path)
+    await asyncio.to_thread(_save_upload, epub_file, epub_path)
 
     try:
-        report = review_pdf_epub(pdf_path, epub_path)
+        report = await _run_in_process(review_pdf_epub, pdf_path, epub_path)
     except RuntimeError as exc:
-        background_tasks.add_task(shutil.rmtree, tmpdir, ignore_errors=True)
-        return JSONResponse(status_code=400, content={"error": str(exc)})
-    background_tasks.add_task(shutil.rmtree, tmpdir, ignore_errors=True)
-    return JSONResponse(content=report, background=background_tasks)
+        background_tasks.add_task(_release_work_dir, tmpdir, pdf_path, epub_path)
+        return ORJSONResponse(status_code=400, content={"error": str(exc)})
+    background_tasks.add_task(_release_work_dir, tmpdir, pdf_path, epub_path)
+    return StreamingResponse(
+        _iter_report_json(report),
+        media_type=JSON_MEDIA_TYPE,
+        background=background_tasks,
+    )
@@ -1,16 +1,42 @@
 from __future__ import annotations
 
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from dataclasses import asdict, dataclass
+import multiprocessing
+import os
+import threading
+from collections.abc import Iterator
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass, fields
 from datetime import UTC, datetime
+from operator import attrgetter
 from pathlib import Path
+from queue import SimpleQueue
 from typing import Callable
 
 from .converter import convert_pdf_to_epub
 from .epub_builder import LAYOUT_FIXED, LAYOUT_REFLOW
+from .utils import (
+    FIXED_WORKERS_ENV,
+    OCR_WORKERS_ENV,
+    REVIEW_WORKERS_ENV,
+    single_render_worker,
+)
 
+EXECUTOR_PROCESS = "process"
+EXECUTOR_THREAD = "thread"
+WORKERS_AUTO = "auto"
+SMALL_PDF_BYTES = 1024 * 1024
+LARGE_PDF_BYTES = 100 * 1024 * 1024
 
-@dataclass
+
+@dataclass(slots=True)
 class BatchItemResult:
     input_pdf: str
     output_epub: str
@@ -21,33 +47,79 @@ class BatchItemResult:
     sections: int | None
 
 
+# Flat fields only, so a shallow zip replaces asdict()'s recursive deepcopy per result.
+_RESULT_FIELDS = tuple(field.name for field in fields(BatchItemResult))
+_result_values = attrgetter(*_RESULT_FIELDS)
+
+
+def _is_pdf_name(name: str) -> bool:
+    # Same rule as Path.suffix: a bare ".pdf" is a stem, not a suffix.
+    return len(name) > 4 and name[-4:].lower() == ".pdf"
+
+
+def _scan_pdfs(root: Path, recursive: bool, unique: dict[str, Path]) -> None:
+    # scandir's cached d_type answers is_dir/is_symlink without a stat per entry, and the
+    # real path is only re-resolved for symlinks; everything else extends the root's.
+    pending = [(os.fspath(root), os.path.realpath(root))]
+    while pending:
+        dir_path, real_dir = pending.pop()
+        try:
+            with os.scandir(dir_path) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive:
+                            pending.append((entry.path, os.path.join(real_dir, entry.name)))
+                    elif _is_pdf_name(entry.name) and entry.is_file():
+                        if entry.is_symlink():
+                            key = os.path.realpath(entry.path)
+                        else:
+                            key = os.path.join(real_dir, entry.name)
+                        unique[key] = Path(entry.path)
+        except OSError:
+            continue
+
+
+def _real_file_path(path: Path, real_parents: dict[str, str]) -> str:
+    # Shell-expanded inputs (dir/*.pdf) share a few parents; realpath() lstat()s every
+    # component, so resolve each parent once and only fully resolve symlinked files.
+    if path.is_symlink():
+        return os.path.realpath(path)
+    parent = os.fspath(path.parent)
+    real_parent = real_parents.get(parent)
+    if real_parent is None:
+        real_parent = real_parents[parent] = os.path.realpath(parent)
+    return os.path.join(real_parent, path.name)
+
+
 def discover_pdf_inputs(paths: list[Path], recursive: bool = True) -> list[Path]:
-    files: list[Path] = []
+    unique: dict[str, Path] = {}
+    real_parents: dict[str, str] = {}
     for path in paths:
         if path.is_file():
-            if path.suffix.lower() == ".pdf":
-                files.append(path)
+            if _is_pdf_name(path.name):
+                unique[_real_file_path(path, real_parents)] = path
             continue
         if path.is_dir():
-            iterator = path.rglob("*") if recursive else path.glob("*")
-            files.extend(p for p in iterator if p.is_file() and p.suffix.lower() == ".pdf")
-    unique: dict[str, Path] = {}
-    for file_path in files:
-        unique[str(file_path.resolve())] = file_path
+            _scan_pdfs(path, recursive, unique)
     return sorted(unique.values(), key=lambda item: str(item).lower())
 
 
 def _build_output_map(input_files: list[Path], output_dir: Path) -> dict[Path, Path]:
     mapping: dict[Path, Path] = {}
     used_names: set[str] = set()
+    # Next suffix to try per lowercased stem, so many same-named PDFs do not rescan from -1.
+    next_suffix: dict[str, int] = {}
     for file_path in input_files:
         base_name = file_path.stem
-        output_name = f"{base_name}.epub"
-        counter = 1
-        while output_name.lower() in used_names:
-            output_name = f"{base_name}-{counter}.epub"
+        lower_base = base_name.lower()
+        counter = next_suffix.get(lower_base, 0)
+        while (
+            key := f"{lower_base}-{counter}.epub" if counter else f"{lower_base}.epub"
+        ) in used_names:
             counter += 1
-        used_names.add(output_name.lower())
+        next_suffix[lower_base] = counter + 1
+        used_names.add(key)
+        output_name = f"{base_name}-{counter}.epub" if counter else f"{base_name}.epub"
         mapping[file_path] = output_dir / output_name
     return mapping
 
@@ -91,48 +163,165 @@ def _convert_one(
         )
 
 
+def _file_sizes(files: list[Path]) -> dict[Path, int]:
+    sizes: dict[Path, int] = {}
+    for path in files:
+        try:
+            sizes[path] = path.stat().st_size
+        except OSError:
+            sizes[path] = 0
+    return sizes
+
+
+def _largest_first(files: list[Path], sizes: dict[Path, int]) -> list[Path]:
+    # The pool already hands work to whichever worker is free; starting the biggest PDFs
+    # first keeps one large file from being picked up last and tailing the whole batch.
+    return sorted(files, key=sizes.__getitem__, reverse=True)
+
+
+def _auto_workers(sizes: list[int]) -> int:
+    cpus = os.cpu_count() or 1
+    workers = max(1, min(4, cpus - 1))
+    if sizes and max(sizes) > LARGE_PDF_BYTES:
+        # Each huge PDF holds its pages and images in memory; keep few of them in flight.
+        return min(workers, 2)
+    if len(sizes) >= 2 * cpus and sum(sizes) / len(sizes) < SMALL_PDF_BYTES:
+        return cpus
+    return workers
+
+
+def _make_executor(executor: str, workers: int) -> Executor:
+    # Extraction, PNG encoding and XHTML building hold the GIL; only processes scale them.
+    # A single worker gains nothing from a child process, so it stays in-process.
+    if executor == EXECUTOR_THREAD or workers == 1:
+        return ThreadPoolExecutor(max_workers=workers)
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=single_render_worker,
+    )
+
+
+@contextmanager
+def _single_render_threads() -> Iterator[None]:
+    # Thread workers share this process's environment: pin the nested page-render, OCR and
+    # review pools to one worker for the batch, as single_render_worker does in children.
+    # Values the user set explicitly are kept, and only the defaults added here are undone.
+    unset = [
+        name
+        for name in (FIXED_WORKERS_ENV, OCR_WORKERS_ENV, REVIEW_WORKERS_ENV)
+        if name not in os.environ
+    ]
+    single_render_worker()
+    try:
+        yield
+    finally:
+        for name in unset:
+            os.environ.pop(name, None)
+
+
+ProgressCallback = Callable[[BatchItemResult, int, int], None]
+
+
+@contextmanager
+def _progress_writer(on_item_done: ProgressCallback) -> Iterator[ProgressCallback]:
+    # Progress output (terminal colors, flushes) runs on its own thread so a slow stdout
+    # never delays collecting the next finished conversion.
+    pending: SimpleQueue[tuple[BatchItemResult, int, int] | None] = SimpleQueue()
+    errors: list[BaseException] = []
+
+    def _drain() -> None:
+        # A failing callback must not stop the queue from draining; the first error is
+        # raised to the caller once the batch is done, as it was without this thread.
+        while (event := pending.get()) is not None:
+            try:
+                on_item_done(*event)
+            except BaseException as exc:
+                if not errors:
+                    errors.append(exc)
+
+    writer = threading.Thread(target=_drain, name="batch-progress", daemon=True)
+    writer.start()
+    try:
+        yield lambda item, done, total: pending.put((item, done, total))
+    finally:
+        pending.put(None)
+        writer.join()
+    if errors:
+        raise errors[0]
+
+
 def convert_pdfs_batch(
     input_paths: list[Path],
     output_dir: Path,
-    workers: int = 2,
+    workers: int | str = 2,
     recursive: bool = True,
     lang: str = "pt-BR",
     layout_mode: str = LAYOUT_REFLOW,
     author: str | None = None,
     title_from_filename: bool = True,
-    on_item_done: Callable[[BatchItemResult, int, int], None] | None = None,
+    on_item_done: ProgressCallback | None = None,
+    executor: str = EXECUTOR_PROCESS,
+    pool: Executor | None = None,
 ) -> dict:
     if layout_mode not in {LAYOUT_REFLOW, LAYOUT_FIXED}:
         raise RuntimeError("layout invalido. Use reflow ou fixed.")
+    if executor not in {EXECUTOR_PROCESS, EXECUTOR_THREAD}:
+        raise RuntimeError("executor invalido. Use process ou thread.")
 
     files = discover_pdf_inputs(input_paths, recursive=recursive)
     if not files:
         raise RuntimeError("Nenhum PDF encontrado nas entradas informadas.")
 
     output_dir.mkdir(parents=True, exist_ok=True)
-    workers = max(1, workers)
+    sizes = _file_sizes(files)
+    if workers == WORKERS_AUTO:
+        workers = _auto_workers(list(sizes.values()))
+    # More workers than CPUs only adds contention for CPU-bound conversions.
+    workers = max(1, min(int(workers), os.cpu_count() or 1))
     output_map = _build_output_map(files, output_dir)
 
     started_at = datetime.now(UTC)
     results: list[BatchItemResult] = []
-    with ThreadPoolExecutor(max_workers=workers) as pool:
-        futures = {
-            pool.submit(
-                _convert_one,
-                pdf_path,
-                output_map[pdf_path],
-                title_from_filename,
-                author,
-                lang,
-                layout_mode,
-            ): pdf_path
-            for pdf_path in files
-        }
-        for future in as_completed(futures):
-            item = future.result()
-            results.append(item)
-            if on_item_done is not None:
-                on_item_done(item, len(results), len(files))
+    with ExitStack() as stack:
+        # A caller-owned pool (the API's shared one) is used as is; otherwise the batch
+        # starts its own and shuts it down at the end.
+        if pool is None:
+            if executor == EXECUTOR_THREAD and workers > 1:
+                stack.enter_context(_single_render_threads())
+            pool = stack.enter_context(_make_executor(executor, workers))
+        if on_item_done is not None:
+            on_item_done = stack.enter_context(_progress_writer(on_item_done))
+        queued = iter(_largest_first(files, sizes))
+        running: set[Future[BatchItemResult]] = set()
+
+        def submit_next() -> None:
+            pdf_path = next(queued, None)
+            if pdf_path is not None:
+                running.add(
+                    pool.submit(
+                        _convert_one,
+                        pdf_path,
+                        output_map[pdf_path],
+                        title_from_filename,
+                        author,
+                        lang,
+                        layout_mode,
+                    )
+                )
+
+        # At most `workers` PDFs in flight, so a shared pool is not flooded by one batch.
+        for _ in range(workers):
+            submit_next()
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            running -= done
+            for future in done:
+                item = future.result()
+                results.append(item)
+                if on_item_done is not None:
+                    on_item_done(item, len(results), len(files))
+                submit_next()
 
     results.sort(key=lambda item: item.input_pdf.lower())
     failed = [item for item in results if item.status == "error"]
@@ -153,7 +342,7 @@ def convert_pdfs_batch(
         "success_count": len(success),
         "failed_count": len(failed),
         "failed_pdfs": [item.input_pdf for item in failed],
-        "results": [asdict(item) for item in results],
+        "results": [dict(zip(_RESULT_FIELDS, _result_values(item))) for item in results],
         "retry_hint": {
             "message": "Rode novamente apenas os arquivos em failed_pdfs.",
             "example": "pdf2epub batch-convert <pdfs_com_erro> -o <pasta_saida> --layout reflow",
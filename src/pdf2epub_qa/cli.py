@@ -1,16 +1,14 @@
 from __future__ import annotations
 
-import json
-import os
 from pathlib import Path
 
 import typer
 
-from .batch import BatchItemResult, convert_pdfs_batch
+from .batch import EXECUTOR_PROCESS, WORKERS_AUTO, BatchItemResult, convert_pdfs_batch
 from .converter import convert_pdf_to_epub
 from .epub_builder import LAYOUT_FIXED, LAYOUT_REFLOW
-from .qa import review_pdf_epub
 from .reporting import build_user_summary, format_user_summary
+from .utils import write_json
 
 app = typer.Typer(add_completion=False, help="PDF para EPUB com QA pagina por pagina")
 
@@ -86,6 +84,8 @@ def review(
     _ensure_epub(input_epub)
     output.parent.mkdir(parents=True, exist_ok=True)
 
+    from .qa import review_pdf_epub
+
     typer.echo("Rodando QA textual...")
     try:
         report = review_pdf_epub(input_pdf, input_epub)
@@ -93,11 +93,11 @@ def review(
         typer.secho(str(exc), fg=typer.colors.RED)
         raise typer.Exit(code=1) from exc
 
-    output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    write_json(output, report)
     summary = build_user_summary(report)
     resumo_path = resumo_output or output.with_suffix(".leigo.json")
     resumo_path.parent.mkdir(parents=True, exist_ok=True)
-    resumo_path.write_text(json.dumps(summary, ensure_ascii=False, indent=2), encoding="utf-8")
+    write_json(resumo_path, summary)
 
     typer.secho(f"Relatorio salvo em {output}", fg=typer.colors.GREEN)
     typer.secho(f"Resumo leigo salvo em {resumo_path}", fg=typer.colors.GREEN)
@@ -130,20 +130,26 @@ def batch_convert(
     ),
     lang: str = typer.Option("pt-BR", "--lang", help="Idioma (pt-BR/en)"),
     author: str | None = typer.Option(None, "--author", help="Autor padrao do lote"),
-    workers: int = typer.Option(
-        max(1, min(4, (os.cpu_count() or 2) - 1)),
+    workers: str = typer.Option(
+        WORKERS_AUTO,
         "--workers",
-        min=1,
-        help="Quantidade de conversoes em paralelo para evitar travamentos.",
+        help="Conversoes em paralelo, ou auto para escolher pelo tamanho dos PDFs.",
     ),
     recursive: bool = typer.Option(
         True,
         "--recursive/--no-recursive",
         help="Buscar PDFs recursivamente ao informar pastas.",
     ),
+    executor: str = typer.Option(
+        EXECUTOR_PROCESS,
+        "--executor",
+        help="Paralelismo: process (padrao, usa varios nucleos) ou thread (OCR/IO).",
+    ),
 ) -> None:
     if layout not in {LAYOUT_REFLOW, LAYOUT_FIXED}:
         raise typer.BadParameter("layout invalido. Use reflow ou fixed.")
+    if workers != WORKERS_AUTO and (not workers.isdigit() or int(workers) < 1):
+        raise typer.BadParameter("workers invalido. Use um numero >= 1 ou auto.")
 
     report_output.parent.mkdir(parents=True, exist_ok=True)
 
@@ -164,18 +170,19 @@ def batch_convert(
         report = convert_pdfs_batch(
             input_paths=inputs,
             output_dir=output_dir,
-            workers=workers,
+            workers=workers if workers == WORKERS_AUTO else int(workers),
             recursive=recursive,
             lang=lang,
             layout_mode=layout,
             author=author,
             on_item_done=_progress,
+            executor=executor,
         )
     except RuntimeError as exc:
         typer.secho(str(exc), fg=typer.colors.RED)
         raise typer.Exit(code=1) from exc
 
-    report_output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    write_json(report_output, report)
     retry_output = report_output.with_suffix(".retry.json")
     retry_data = {
         "failed_pdfs": report["failed_pdfs"],
@@ -183,7 +190,7 @@ def batch_convert(
         "report_path": str(report_output),
         "retry_hint": report["retry_hint"],
     }
-    retry_output.write_text(json.dumps(retry_data, ensure_ascii=False, indent=2), encoding="utf-8")
+    write_json(retry_output, retry_data)
 
     success_count = int(report["success_count"])
     failed_count = int(report["failed_count"])
@@ -191,7 +198,7 @@ def batch_convert(
     typer.secho(
         (
             f"Lote finalizado: total={total_count}, sucesso={success_count}, "
-            f"erros={failed_count}, workers={workers}"
+            f"erros={failed_count}, workers={report['workers']}"
         ),
         fg=typer.colors.GREEN if failed_count == 0 else typer.colors.YELLOW,
     )
@@ -3,6 +3,8 @@ from __future__ import annotations
 from dataclasses import dataclass
 from pathlib import Path
 
+import fitz
+
 from .epub_builder import LAYOUT_FIXED, LAYOUT_REFLOW, build_epub
 from .pdf_extractor import extract_pdf
 
@@ -27,16 +29,23 @@ def convert_pdf_to_epub(
     if layout_mode not in {LAYOUT_REFLOW, LAYOUT_FIXED}:
         raise RuntimeError("layout_mode invalido. Use 'reflow' ou 'fixed'.")
 
-    pdf = extract_pdf(pdf_path)
-    sections = build_epub(
-        pdf,
-        output_path,
-        title=title,
-        author=author,
-        lang=lang,
-        layout_mode=layout_mode,
-        source_pdf_path=pdf_path,
-    )
+    # Fixed layout renders every page after extracting it; parse the PDF once for both.
+    source_doc = fitz.open(pdf_path) if layout_mode == LAYOUT_FIXED else None
+    try:
+        pdf = extract_pdf(pdf_path, source_doc)
+        sections = build_epub(
+            pdf,
+            output_path,
+            title=title,
+            author=author,
+            lang=lang,
+            layout_mode=layout_mode,
+            source_pdf_path=pdf_path,
+            source_doc=source_doc,
+        )
+    finally:
+        if source_doc is not None:
+            source_doc.close()
     image_count = sum(len(page.images) for page in pdf.pages)
     return ConversionResult(
         pages=len(pdf.pages),
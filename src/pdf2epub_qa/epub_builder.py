@@ -1,6 +1,12 @@
 from __future__ import annotations
 
+import functools
+import multiprocessing
 import os
+import re
+import zipfile
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from html import escape
 from pathlib import Path
@@ -10,7 +16,7 @@ import fitz
 from ebooklib import epub
 
 from .pdf_extractor import PageData, PdfContent
-from .utils import detect_heading, text_to_paragraphs
+from .utils import FIXED_WORKERS_ENV, detect_heading, text_to_paragraphs
 
 LAYOUT_REFLOW = "reflow"
 LAYOUT_FIXED = "fixed"
@@ -21,9 +27,29 @@ IMAGE_MEDIA_TYPES = {
     "jpeg": "image/jpeg",
     "gif": "image/gif",
 }
+# Below this many pages, starting render processes costs more than it saves.
+FIXED_PARALLEL_MIN_PAGES = 8
+FIXED_JPEG_QUALITY = 85
+# XHTML/CSS deflate nearly as well at level 3 as at ebooklib's default 6, at about half the cost.
+EPUB_COMPRESS_LEVEL = 3
+_PRECOMPRESSED_SUFFIXES = (".png", ".jpg", ".jpeg", ".gif")
 
 
-@dataclass
+class _EpubWriter(epub.EpubWriter):
+    def _write_items(self) -> None:
+        # Images are already entropy-coded; deflating them again costs CPU for ~0% gain.
+        writestr = self.out.writestr
+
+        def store_images(name, data, compress_type=None, compresslevel=None):
+            if isinstance(name, str) and name.lower().endswith(_PRECOMPRESSED_SUFFIXES):
+                compress_type = compress_type or zipfile.ZIP_STORED
+            writestr(name, data, compress_type, compresslevel)
+
+        self.out.writestr = store_images
+        super()._write_items()
+
+
+@dataclass(slots=True)
 class SectionData:
     title: str
     pages: list[PageData]
@@ -72,92 +98,191 @@ def add_images(book: epub.EpubBook, pdf: PdfContent) -> dict[str, str]:
     return image_map
 
 
-def render_section(section: SectionData, image_map: dict[str, str], lang: str) -> str:
-    lines = [
-        f'<html xmlns="http://www.w3.org/1999/xhtml" lang="{escape(lang)}">',
-        "<head>",
-        '<meta charset="utf-8"/>',
-        f"<title>{escape(section.title)}</title>",
-        "<style>",
-        "body { font-family: serif; line-height: 1.5; }",
-        "img { max-width: 100%; height: auto; }",
-        "figure { margin: 1em 0; }",
-        "</style>",
-        "</head>",
-        "<body>",
-    ]
-
-    if section.title:
-        lines.append(f"<h1>{escape(section.title)}</h1>")
-
+# Generated ids and paths (p1_img2, images/p1_img2.png) contain nothing html.escape changes.
+_PLAIN_ATTR_RE = re.compile(r"[A-Za-z0-9_./-]*")
+
+_XHTML_HEAD = (
+    '<html xmlns="http://www.w3.org/1999/xhtml" lang="{lang}">\n'
+    "<head>\n"
+    '<meta charset="utf-8"/>\n'
+    "<title>{title}</title>\n"
+    "<style>\n"
+    "{style}\n"
+    "</style>\n"
+    "</head>\n"
+    "<body>"
+)
+_XHTML_TAIL = "</body>\n</html>"
+_SECTION_STYLE = (
+    "body { font-family: serif; line-height: 1.5; }\n"
+    "img { max-width: 100%; height: auto; }\n"
+    "figure { margin: 1em 0; }"
+)
+_FIXED_PAGE_STYLE = (
+    "html, body { margin: 0; padding: 0; width: 100%; height: 100%; }\n"
+    "body { background: white; }\n"
+    ".page-wrap { width: 100vw; height: 100vh; overflow: hidden; }\n"
+    ".page-wrap img { width: 100%; height: 100%; object-fit: contain; display: block; }\n"
+    ".pdf-text { display: none; }"
+)
+
+
+@functools.lru_cache(maxsize=4096)
+def _escape_attr(value: str) -> str:
+    # Image ids, sources and lang repeat across every page of a book; escape each once.
+    if _PLAIN_ATTR_RE.fullmatch(value):
+        return value
+    return escape(value)
+
+
+def _section_body(section: SectionData, image_map: dict[str, str]) -> Iterator[str]:
     for page in section.pages:
-        lines.append(f'<a id="page-{page.index + 1}"></a>')
+        yield f'<a id="page-{page.index + 1}"></a>'
         for para in text_to_paragraphs(page.text):
-            lines.append(f"<p>{escape(para)}</p>")
+            yield f"<p>{escape(para)}</p>"
         for image in page.images:
             src = image_map.get(image.id)
             if src:
-                lines.append(
-                    f'<figure><img src="{escape(src)}" alt="Image {escape(image.id)}"/></figure>'
+                yield (
+                    f'<figure><img src="{_escape_attr(src)}" '
+                    f'alt="Image {_escape_attr(image.id)}"/></figure>'
                 )
 
-    lines.append("</body>")
-    lines.append("</html>")
-    return "\n".join(lines)
+
+def render_section(section: SectionData, image_map: dict[str, str], lang: str) -> str:
+    title = escape(section.title)
+    head = _XHTML_HEAD.format(lang=_escape_attr(lang), title=title, style=_SECTION_STYLE)
+    heading = (f"<h1>{title}</h1>",) if section.title else ()
+    return "\n".join((head, *heading, *_section_body(section, image_map), _XHTML_TAIL))
+
+
+@functools.lru_cache(maxsize=16)
+def _fixed_page_template(lang: str) -> str:
+    # Only the page number, image and hidden text vary between pages of a book, so the
+    # head (lang, style) is formatted once and each page fills three slots.
+    head = _XHTML_HEAD.format(lang=_escape_attr(lang), title="\0", style=_FIXED_PAGE_STYLE)
+    head = head.replace("{", "{{").replace("}", "}}").replace("\0", "Page {page_number}")
+    return (
+        f"{head}\n"
+        '<a id="page-{page_number}"></a>\n'
+        '<div class="page-wrap">\n'
+        '<img src="{image_file_name}" alt="Page {page_number}" data-pdf-page="{page_number}"/>\n'
+        "</div>\n"
+        '<div class="pdf-text">{hidden_text}</div>\n'
+        f"{_XHTML_TAIL}"
+    )
 
 
 def render_fixed_page(page_number: int, image_file_name: str, page_text: str, lang: str) -> str:
-    hidden_text = "\n".join(f"<p>{escape(para)}</p>" for para in text_to_paragraphs(page_text))
-    lines = [
-        f'<html xmlns="http://www.w3.org/1999/xhtml" lang="{escape(lang)}">',
-        "<head>",
-        '<meta charset="utf-8"/>',
-        f"<title>Page {page_number}</title>",
-        "<style>",
-        "html, body { margin: 0; padding: 0; width: 100%; height: 100%; }",
-        "body { background: white; }",
-        ".page-wrap { width: 100vw; height: 100vh; overflow: hidden; }",
-        ".page-wrap img { width: 100%; height: 100%; object-fit: contain; display: block; }",
-        ".pdf-text { display: none; }",
-        "</style>",
-        "</head>",
-        "<body>",
-        f'<a id="page-{page_number}"></a>',
-        '<div class="page-wrap">',
-        (
-            f'<img src="{escape(image_file_name)}" alt="Page {page_number}" '
-            f'data-pdf-page="{page_number}"/>'
-        ),
-        "</div>",
-        f'<div class="pdf-text">{hidden_text}</div>',
-        "</body>",
-        "</html>",
-    ]
-    return "\n".join(lines)
+    # Scanned pages often have no text layer; skip paragraph splitting for them.
+    hidden_text = (
+        "\n".join(f"<p>{escape(para)}</p>" for para in text_to_paragraphs(page_text))
+        if page_text
+        else ""
+    )
+    return _fixed_page_template(lang).format(
+        page_number=page_number,
+        image_file_name=_escape_attr(image_file_name),
+        hidden_text=hidden_text,
+    )
+
+
+def _fixed_image_format() -> str:
+    image_format = os.getenv("PDF2EPUB_QA_FIXED_FORMAT", "png").strip().lower()
+    if image_format not in {"png", "jpg"}:
+        raise RuntimeError("PDF2EPUB_QA_FIXED_FORMAT invalido. Use png ou jpg.")
+    return image_format
+
+
+def _encode_pixmap(pix: fitz.Pixmap, image_format: str) -> tuple[bytes, int, int]:
+    # JPEG is several times smaller than PNG for rendered pages and cheaper to encode.
+    if image_format == "jpg":
+        data = pix.tobytes("jpg", jpg_quality=FIXED_JPEG_QUALITY)
+    else:
+        data = pix.tobytes("png")
+    return data, pix.width, pix.height
+
+
+def _render_page_range(
+    source_pdf_path: Path, start: int, stop: int, dpi: int, image_format: str = "png"
+) -> list[tuple[bytes, int, int]]:
+    # Runs in a worker process: fitz documents cannot be shared, so each range reopens it.
+    with fitz.open(source_pdf_path) as doc:
+        return [
+            _encode_pixmap(doc[index].get_pixmap(dpi=dpi, alpha=False), image_format)
+            for index in range(start, stop)
+        ]
+
+
+def _fixed_render_workers(page_count: int) -> int:
+    if page_count < FIXED_PARALLEL_MIN_PAGES:
+        return 1
+    default_workers = min(8, os.cpu_count() or 1)
+    workers = int(os.getenv(FIXED_WORKERS_ENV, str(default_workers)))
+    return max(1, min(workers, page_count))
+
+
+def _render_fixed_pages(
+    source_pdf_path: Path,
+    dpi: int,
+    image_format: str = "png",
+    source_doc: fitz.Document | None = None,
+) -> list[tuple[bytes, int, int]]:
+    if source_doc is None:
+        with fitz.open(source_pdf_path) as owned_doc:
+            return _render_fixed_pages(source_pdf_path, dpi, image_format, owned_doc)
+
+    page_count = source_doc.page_count
+    workers = _fixed_render_workers(page_count)
+    if workers == 1:
+        # Each pixmap is dropped as soon as it is encoded; only the bytes stay alive.
+        return [
+            _encode_pixmap(page.get_pixmap(dpi=dpi, alpha=False), image_format)
+            for page in source_doc
+        ]
+
+    # PNG encoding dominates fixed layout; render contiguous page ranges in parallel and
+    # keep all ebooklib calls in this process.
+    step = -(-page_count // (workers * 2))
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    ) as pool:
+        futures = [
+            pool.submit(
+                _render_page_range,
+                source_pdf_path,
+                start,
+                min(start + step, page_count),
+                dpi,
+                image_format,
+            )
+            for start in range(0, page_count, step)
+        ]
+        return [page for future in futures for page in future.result()]
 
 
 def add_fixed_page_images(
     book: epub.EpubBook,
     source_pdf_path: Path,
+    source_doc: fitz.Document | None = None,
 ) -> list[tuple[int, str, int, int]]:
     dpi = int(os.getenv("PDF2EPUB_QA_FIXED_DPI", "144"))
-    doc = fitz.open(source_pdf_path)
+    image_format = _fixed_image_format()
+    media_type = IMAGE_MEDIA_TYPES[image_format]
     pages: list[tuple[int, str, int, int]] = []
 
-    for i, page in enumerate(doc):
-        page_number = i + 1
-        pix = page.get_pixmap(dpi=dpi, alpha=False)
-        file_name = f"fixed_pages/page_{page_number}.png"
+    rendered = _render_fixed_pages(source_pdf_path, dpi, image_format, source_doc)
+    for page_number, (image_bytes, width, height) in enumerate(rendered, start=1):
+        file_name = f"fixed_pages/page_{page_number}.{image_format}"
         item = epub.EpubItem(
             uid=f"render-page-{page_number}",
             file_name=file_name,
-            media_type="image/png",
-            content=pix.tobytes("png"),
+            media_type=media_type,
+            content=image_bytes,
         )
         book.add_item(item)
-        pages.append((page_number, file_name, pix.width, pix.height))
+        pages.append((page_number, file_name, width, height))
 
-    doc.close()
     return pages
 
 
@@ -166,10 +291,11 @@ def build_fixed_sections(
     pdf: PdfContent,
     source_pdf_path: Path,
     lang_value: str,
+    source_doc: fitz.Document | None = None,
 ) -> tuple[list[SectionData], list[epub.EpubHtml]]:
     # Keep extracted images in package so image QA remains meaningful.
     add_images(book, pdf)
-    page_images = add_fixed_page_images(book, source_pdf_path)
+    page_images = add_fixed_page_images(book, source_pdf_path, source_doc)
     sections: list[SectionData] = []
     chapters: list[epub.EpubHtml] = []
 
@@ -209,6 +335,7 @@ def build_epub(
     lang: str | None = None,
     layout_mode: str = LAYOUT_REFLOW,
     source_pdf_path: Path | None = None,
+    source_doc: fitz.Document | None = None,
 ) -> list[SectionData]:
     book = epub.EpubBook()
     book.set_identifier(str(uuid4()))
@@ -221,7 +348,9 @@ def build_epub(
     if layout_mode == LAYOUT_FIXED:
         if source_pdf_path is None:
             raise RuntimeError("Modo fixed requer caminho do PDF de origem.")
-        sections, chapters = build_fixed_sections(book, pdf, source_pdf_path, lang_value)
+        sections, chapters = build_fixed_sections(
+            book, pdf, source_pdf_path, lang_value, source_doc
+        )
     else:
         image_map = add_images(book, pdf)
         sections = build_sections(pdf.pages)
@@ -240,5 +369,9 @@ def build_epub(
     book.add_item(epub.EpubNcx())
     book.add_item(epub.EpubNav())
 
-    epub.write_epub(str(output_path), book, {})
+    # Not epub.write_epub: it only knows the stock writer, and it swallows OSError (returning
+    # False), which would report a conversion whose EPUB was never written.
+    writer = _EpubWriter(str(output_path), book, {"compresslevel": EPUB_COMPRESS_LEVEL})
+    writer.process()
+    writer.write()
     return sections
@@ -1,16 +1,17 @@
 from __future__ import annotations
 
-import io
+import multiprocessing
 import os
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 
 import fitz
 
-from .utils import env_flag
+from .utils import OCR_WORKERS_ENV, env_flag
 
 
-@dataclass
+@dataclass(slots=True)
 class ImageData:
     id: str
     page_index: int
@@ -18,7 +19,7 @@ class ImageData:
     bytes: bytes
 
 
-@dataclass
+@dataclass(slots=True)
 class PageData:
     index: int
     text: str
@@ -33,31 +34,48 @@ class PdfContent:
     language: str | None
 
 
-def extract_pdf(pdf_path: Path) -> PdfContent:
+def extract_pdf(pdf_path: Path, doc: fitz.Document | None = None) -> PdfContent:
+    # Callers that keep working on the PDF (fixed layout) pass their open document and
+    # stay responsible for closing it; otherwise it is opened and closed here.
+    if doc is None:
+        with fitz.open(pdf_path) as owned_doc:
+            return extract_pdf(pdf_path, owned_doc)
+
     enable_ocr = env_flag("PDF2EPUB_QA_ENABLE_OCR", False)
     ocr_lang = os.getenv("PDF2EPUB_QA_OCR_LANG", "por+eng")
 
-    doc = fitz.open(pdf_path)
     metadata = doc.metadata or {}
     pages: list[PageData] = []
+    # Logos and backgrounds reuse one xref on many pages; pull each stream out only once.
+    extracted: dict[int, tuple[bytes | None, str]] = {}
+    ocr_indexes: list[int] = []
 
     for i, page in enumerate(doc):
         text = page.get_text("text") or ""
         if enable_ocr and not text.strip():
-            text = _ocr_page(page, ocr_lang) or text
+            ocr_indexes.append(i)
         page_images: list[ImageData] = []
         for img_index, img in enumerate(page.get_images(full=True)):
             xref = img[0]
-            base = doc.extract_image(xref)
-            image_bytes = base.get("image")
-            ext = (base.get("ext") or "png").lower()
+            cached = extracted.get(xref)
+            if cached is None:
+                base = doc.extract_image(xref)
+                cached = extracted[xref] = (
+                    base.get("image"),
+                    (base.get("ext") or "png").lower(),
+                )
+            image_bytes, ext = cached
             if not image_bytes:
                 continue
             image_id = f"p{i + 1}_img{img_index + 1}"
             page_images.append(ImageData(image_id, i, ext, image_bytes))
         pages.append(PageData(i, text, page_images))
 
-    doc.close()
+    # OCR runs after the text pass so every scanned page can be handed out at once.
+    if ocr_indexes:
+        for index, ocr_text in zip(ocr_indexes, _ocr_pages(doc, pdf_path, ocr_indexes, ocr_lang)):
+            if ocr_text:
+                pages[index].text = ocr_text
 
     return PdfContent(
         pages=pages,
@@ -78,5 +96,30 @@ def _ocr_page(page: fitz.Page, lang: str) -> str:
         ) from exc
 
     pix = page.get_pixmap(dpi=200, alpha=False)
-    image = Image.open(io.BytesIO(pix.tobytes("png")))
+    # Wrap the raw RGB samples directly instead of encoding and re-decoding a PNG.
+    image = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
     return pytesseract.image_to_string(image, lang=lang)
+
+
+def _ocr_page_range(pdf_path: Path, indexes: list[int], lang: str) -> list[str]:
+    # Runs in a worker process, which needs its own fitz document.
+    with fitz.open(pdf_path) as doc:
+        return [_ocr_page(doc[index], lang) for index in indexes]
+
+
+def _ocr_pages(doc: fitz.Document, pdf_path: Path, indexes: list[int], lang: str) -> list[str]:
+    default_workers = min(8, os.cpu_count() or 1)
+    workers = max(1, min(int(os.getenv(OCR_WORKERS_ENV, str(default_workers))), len(indexes)))
+    if workers == 1:
+        return [_ocr_page(doc[index], lang) for index in indexes]
+
+    # Tesseract is CPU-bound per page; spread scanned pages over processes in page order.
+    step = -(-len(indexes) // workers)
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    ) as pool:
+        futures = [
+            pool.submit(_ocr_page_range, pdf_path, indexes[start : start + step], lang)
+            for start in range(0, len(indexes), step)
+        ]
+        return [text for future in futures for text in future.result()]
@@ -1,122 +1,333 @@
 from __future__ import annotations
 
+import difflib
+import functools
 import io
+import multiprocessing
 import os
 import posixpath
 import re
-from difflib import SequenceMatcher
+from bisect import bisect_right
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from importlib.util import find_spec
+from itertools import accumulate
 from pathlib import Path
-
-import ebooklib
-import fitz
-from bs4 import BeautifulSoup
-from ebooklib import epub
-
-from .pdf_extractor import extract_pdf
-from .utils import env_flag, limit_text, normalize_text, tokenize
-
-
+from typing import TYPE_CHECKING
+
+from .utils import (
+    REVIEW_WORKERS_ENV,
+    clear_tokenize_cache,
+    env_flag,
+    normalize_text,
+    text_to_paragraphs,
+    tokenize,
+)
+
+if TYPE_CHECKING:
+    # fitz, ebooklib, lxml and rapidfuzz are imported inside the functions that use them,
+    # so importing this module (for the text helpers or a worker) does not load them.
+    import fitz
+    import lxml.html
+    from ebooklib import epub
+
+# A page render plus image diff is ~30 ms; below this the pool startup dominates.
+VISUAL_PARALLEL_MIN_PAGES = 16
+
+_PAGE_ANCHOR_RE = re.compile(r"^page-\d+$")
+_FIXED_PAGE_NAME_RE = re.compile(r"^fixed_pages/page_(\d+)\.(?:png|jpg)$")
+_PLAIN_HREF_RE = re.compile(r"[^/\\.][^/\\]*(?:/[^/\\.][^/\\]*)*")
+# Indel keeps a len(a) x len(b) bit matrix: two 60k-token gaps take ~450 MB. Past this many
+# cells (32 MB) difflib's matcher is used instead, linear in memory.
+_MAX_INDEL_CELLS = 1 << 28
+
+
+@functools.lru_cache(maxsize=1024)
 def normalize_epub_path(path: str) -> str:
     return posixpath.normpath(path.replace("\\", "/"))
 
 
+def _resolve_epub_href(doc_dir: str, src: str) -> str:
+    # Plain relative hrefs (no ".", ".." or empty segments, no backslashes) are already
+    # normal once joined to a normalized directory; only the rest go through normpath.
+    if _PLAIN_HREF_RE.fullmatch(src) and not doc_dir.startswith("/"):
+        return f"{doc_dir}/{src}" if doc_dir else src
+    return normalize_epub_path(posixpath.join(doc_dir, src))
+
+
 def is_rendered_page_asset(file_name: str) -> bool:
     return normalize_epub_path(file_name).startswith("fixed_pages/")
 
 
-def extract_epub_text(epub_path: Path) -> tuple[str, dict[int, str], int]:
-    book = epub.read_epub(str(epub_path))
+def parse_epub_document(content: bytes) -> lxml.html.HtmlElement | None:
+    # lxml's C parser; XHTML is read as HTML so tag names carry no namespace.
+    import lxml.html
+    from lxml import etree
+
+    try:
+        return lxml.html.document_fromstring(content)
+    except etree.ParserError:
+        return None
+
+
+def _page_segments(root: lxml.html.HtmlElement) -> Iterator[tuple[int | None, str]]:
+    # One document-order walk: each page-N anchor starts a new run of text nodes, so no
+    # [[PAGE_N]] markers are written into the tree and split back out of the text.
+    # Text before the first anchor comes out with page None.
+    from lxml import etree
+
+    etree.strip_elements(root, "script", "style", etree.Comment, with_tail=False)
+    page_num: int | None = None
+    chunks: list[str] = []
+    for event, element in etree.iterwalk(root, events=("start", "end")):
+        if event == "end":
+            if element.tail and element is not root:
+                chunks.append(element.tail)
+            continue
+        page_id = element.get("id")
+        if page_id and _PAGE_ANCHOR_RE.match(page_id):
+            yield page_num, "\n".join(chunks)
+            page_num, chunks = int(page_id[5:]), []
+        if element.text:
+            chunks.append(element.text)
+    yield page_num, "\n".join(chunks)
+
+
+def extract_epub_text(
+    book: epub.EpubBook,
+) -> tuple[list[tuple[int | None, str]], dict[int, str], int]:
+    import ebooklib
+
     page_text_map: dict[int, str] = {}
-    full_text_parts: list[str] = []
+    segments: list[tuple[int | None, str]] = []
+    image_count = 0
 
+    # One pass over the items: documents give text, other items are counted as images.
     for item in book.get_items():
         if item.get_type() != ebooklib.ITEM_DOCUMENT:
+            media_type = item.media_type
+            if media_type and media_type.startswith("image/"):
+                if not is_rendered_page_asset(item.get_name()):
+                    image_count += 1
             continue
-        soup = BeautifulSoup(item.get_content(), "html.parser")
-        for anchor in soup.find_all(id=re.compile(r"^page-\d+$")):
-            page_id = anchor.get("id") or ""
-            number = page_id.split("-", 1)[-1]
-            anchor.insert_before(f"[[PAGE_{number}]]")
-
-        text = soup.get_text("\n")
-        parts = re.split(r"\[\[PAGE_(\d+)\]\]", text)
-        if len(parts) == 1:
-            full_text_parts.append(text)
+        root = parse_epub_document(item.get_content())
+        if root is None:
             continue
-        if parts[0].strip():
-            full_text_parts.append(parts[0])
-        for idx in range(1, len(parts), 2):
-            page_num = int(parts[idx])
-            segment = parts[idx + 1]
+        for page_num, segment in _page_segments(root):
+            if page_num is None:
+                if segment.strip():
+                    segments.append((None, segment))
+                continue
             existing = page_text_map.get(page_num, "")
             page_text_map[page_num] = (existing + "\n" + segment).strip()
-            full_text_parts.append(segment)
+            segments.append((page_num, segment))
 
-    full_text = "\n".join(full_text_parts)
-    image_count = 0
-    for item in book.get_items():
-        if not item.media_type or not item.media_type.startswith("image/"):
-            continue
-        if is_rendered_page_asset(item.get_name()):
-            continue
-        image_count += 1
-    return full_text, page_text_map, image_count
+    return segments, page_text_map, image_count
+
+
+def paragraph_tokens(text: str) -> list[tuple[str, ...]]:
+    return [tokens for para in text_to_paragraphs(text) if (tokens := tuple(tokenize(para)))]
 
 
-def build_page_token_ranges(pages) -> tuple[list[str], list[tuple[int, int, int]]]:
+def build_page_token_ranges(
+    pages,
+) -> tuple[list[str], list[tuple[int, int, int]], list[tuple[str, ...]]]:
     all_tokens: list[str] = []
     ranges: list[tuple[int, int, int]] = []
+    paragraphs: list[tuple[str, ...]] = []
     cursor = 0
     for page in pages:
-        tokens = tokenize(page.text)
+        page_paragraphs = paragraph_tokens(page.text)
         start = cursor
-        cursor += len(tokens)
-        end = cursor
-        ranges.append((page.index + 1, start, end))
-        all_tokens.extend(tokens)
-    return all_tokens, ranges
-
-
-def page_for_index(ranges: list[tuple[int, int, int]], index: int) -> int | None:
-    for page_num, start, end in ranges:
-        if start <= index < end:
-            return page_num
-    return None
+        for tokens in page_paragraphs:
+            all_tokens.extend(tokens)
+        cursor = len(all_tokens)
+        ranges.append((page.index + 1, start, cursor))
+        paragraphs.extend(page_paragraphs)
+    return all_tokens, ranges, paragraphs
+
+
+def build_epub_token_ranges(
+    segments: list[tuple[int | None, str]],
+) -> tuple[list[str], list[tuple[int, int, int]], list[tuple[str, ...]]]:
+    # Text before a document's first anchor (a chapter heading) counts toward the next page.
+    all_tokens: list[str] = []
+    ranges: list[tuple[int, int, int]] = []
+    paragraphs: list[tuple[str, ...]] = []
+    start = 0
+    for page_num, segment in segments:
+        for tokens in paragraph_tokens(segment):
+            all_tokens.extend(tokens)
+            paragraphs.append(tokens)
+        if page_num is not None:
+            ranges.append((page_num, start, len(all_tokens)))
+            start = len(all_tokens)
+    return all_tokens, ranges, paragraphs
+
+
+def _matching_blocks(a: list, b: list) -> list[tuple[int, int, int]]:
+    if len(a) * len(b) > _MAX_INDEL_CELLS:
+        return difflib.SequenceMatcher(None, a, b).get_matching_blocks()
+    from rapidfuzz.distance import Indel
+
+    return Indel.opcodes(a, b).as_matching_blocks()
+
+
+def _gap_opcodes(a: list, b: list) -> list[tuple[str, int, int, int, int]]:
+    if len(a) * len(b) > _MAX_INDEL_CELLS:
+        return difflib.SequenceMatcher(None, a, b).get_opcodes()
+    from rapidfuzz.distance import Indel
+
+    return Indel.opcodes(a, b)
+
+
+def _diff_by_page(
+    pdf_tokens: list[str],
+    epub_tokens: list[str],
+    pdf_ranges: list[tuple[int, int, int]],
+    epub_ranges: list[tuple[int, int, int]],
+) -> Iterator[tuple[str, int, int, int, int]]:
+    epub_spans: dict[int, tuple[int, int]] = {}
+    for page_num, start, end in epub_ranges:
+        # A page anchored in several documents keeps its first span; the rest is extra text.
+        epub_spans.setdefault(page_num, (start, end))
+    used: list[tuple[int, int]] = []
+    tj2 = 0
+    for page_num, i1, i2 in pdf_ranges:
+        span = epub_spans.get(page_num)
+        if span is not None:
+            used.append(span)
+        tj, tj2 = span or (tj2, tj2)
+        if i1 < i2 or tj < tj2:
+            for tag, a1, a2, b1, b2 in _gap_opcodes(pdf_tokens[i1:i2], epub_tokens[tj:tj2]):
+                yield tag, i1 + a1, i1 + a2, tj + b1, tj + b2
+    # EPUB text outside the PDF's pages (unanchored, or an unknown page number) is extra.
+    end_i = len(pdf_tokens)
+    cursor = 0
+    for start, end in sorted(used):
+        if cursor < start:
+            yield "insert", end_i, end_i, cursor, start
+        cursor = max(cursor, end)
+    if cursor < len(epub_tokens):
+        yield "insert", end_i, end_i, cursor, len(epub_tokens)
+
+
+def diff_token_opcodes(
+    pdf_paragraphs: list[tuple[str, ...]],
+    epub_paragraphs: list[tuple[str, ...]],
+    pdf_ranges: list[tuple[int, int, int]] | None = None,
+    epub_ranges: list[tuple[int, int, int]] | None = None,
+) -> Iterator[tuple[str, int, int, int, int]]:
+    # A token-level diff of a whole book is quadratic in time and memory. Paragraphs are
+    # aligned first and only the tokens between two aligned paragraphs are diffed word by
+    # word; opcodes still use indexes into the flattened token lists.
+    if pdf_paragraphs == epub_paragraphs:
+        # Unchanged text (typical for fixed layout and CI re-runs) needs no matcher at all.
+        total = sum(map(len, pdf_paragraphs))
+        if total:
+            yield "equal", 0, total, 0, total
+        return
+    pdf_starts = [0, *accumulate(map(len, pdf_paragraphs))]
+    epub_starts = [0, *accumulate(map(len, epub_paragraphs))]
+    pdf_tokens = [token for tokens in pdf_paragraphs for token in tokens]
+    epub_tokens = [token for tokens in epub_paragraphs for token in tokens]
+    blocks = _matching_blocks(pdf_paragraphs, epub_paragraphs)
+    if pdf_ranges and epub_ranges:
+        # When paragraph breaks differ (another tool's EPUB), few paragraphs align and one
+        # gap spans most of the book. Page anchors covering most of the EPUB give page-sized
+        # gaps instead.
+        aligned = sum(pdf_starts[a + size] - pdf_starts[a] for a, _, size in blocks)
+        anchored = sum(end - start for _, start, end in epub_ranges)
+        if aligned * 2 < len(pdf_tokens) and anchored * 2 >= len(epub_tokens):
+            yield from _diff_by_page(pdf_tokens, epub_tokens, pdf_ranges, epub_ranges)
+            return
+    i = j = 0
+    for a, b, size in blocks:
+        ti, ti2, tj, tj2 = pdf_starts[i], pdf_starts[a], epub_starts[j], epub_starts[b]
+        if ti < ti2 or tj < tj2:
+            for tag, i1, i2, j1, j2 in _gap_opcodes(pdf_tokens[ti:ti2], epub_tokens[tj:tj2]):
+                yield tag, ti + i1, ti + i2, tj + j1, tj + j2
+        i, j = a + size, b + size
+        if size:
+            yield "equal", ti2, pdf_starts[i], tj2, epub_starts[j]
+
+
+def page_for_index(
+    ranges: list[tuple[int, int, int]], index: int, starts: list[int] | None = None
+) -> int | None:
+    # Ranges are ordered and contiguous: the page is the last one starting at or before index.
+    # Callers looking up many indexes pass the precomputed starts.
+    if starts is None:
+        starts = [start for _, start, _ in ranges]
+    pos = bisect_right(starts, index) - 1
+    if pos < 0 or index >= ranges[pos][2]:
+        return None
+    return ranges[pos][0]
+
+
+def _join_limited(tokens: list[str], start: int, end: int, max_len: int) -> str:
+    # limit_text(" ".join(tokens[start:end]), max_len) without joining a long deleted or
+    # inserted range that is cut after the first few words anyway.
+    parts: list[str] = []
+    length = -1
+    for index in range(start, min(end, len(tokens))):
+        token = tokens[index]
+        parts.append(token)
+        length += len(token) + 1
+        if length > max_len:
+            return " ".join(parts)[: max_len - 3] + "..."
+    return " ".join(parts)
 
 
 def make_segment(tokens: list[str], start: int, end: int) -> dict[str, str]:
-    before = " ".join(tokens[max(0, start - 5) : start])
-    snippet = " ".join(tokens[start:end])
-    after = " ".join(tokens[end : end + 5])
     return {
-        "snippet": limit_text(snippet, 200),
-        "context_before": limit_text(before, 120),
-        "context_after": limit_text(after, 120),
+        "snippet": _join_limited(tokens, start, end, 200),
+        "context_before": _join_limited(tokens, max(0, start - 5), start, 120),
+        "context_after": _join_limited(tokens, end, end + 5, 120),
     }
 
 
+def _visual_workers(page_count: int) -> int:
+    if page_count < VISUAL_PARALLEL_MIN_PAGES:
+        return 1
+    default_workers = min(8, os.cpu_count() or 1)
+    workers = int(os.getenv(REVIEW_WORKERS_ENV, str(default_workers)))
+    return max(1, min(workers, page_count))
+
+
 def review_pdf_epub(
     pdf_path: Path,
     epub_path: Path,
     page_threshold: float = 0.9,
 ) -> dict:
-    pdf = extract_pdf(pdf_path)
-    epub_text, epub_page_map, image_count_epub = extract_epub_text(epub_path)
+    from ebooklib import epub
+    from rapidfuzz.distance import Indel
 
-    pdf_tokens, ranges = build_page_token_ranges(pdf.pages)
-    epub_tokens = tokenize(epub_text)
+    from .pdf_extractor import extract_pdf
 
-    matcher = SequenceMatcher(None, pdf_tokens, epub_tokens)
-    matched = sum(block.size for block in matcher.get_matching_blocks())
-    coverage = (matched / max(len(pdf_tokens), 1)) * 100
+    pdf = extract_pdf(pdf_path)
+    # Parsed once: text extraction and visual QA both walk the same book.
+    book = epub.read_epub(str(epub_path))
+    epub_segments, epub_page_map, image_count_epub = extract_epub_text(book)
 
+    pdf_tokens, ranges, pdf_paragraphs = build_page_token_ranges(pdf.pages)
+    epub_tokens, epub_ranges, epub_paragraphs = build_epub_token_ranges(epub_segments)
+    clear_tokenize_cache()
+
+    range_starts = [start for _, start, _ in ranges]
+    matched = 0
     missing_segments: list[dict] = []
     extra_segments: list[dict] = []
 
-    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+    for tag, i1, i2, j1, j2 in diff_token_opcodes(
+        pdf_paragraphs, epub_paragraphs, ranges, epub_ranges
+    ):
+        if tag == "equal":
+            matched += i2 - i1
+            continue
         if tag in ("delete", "replace") and i2 > i1:
             seg = make_segment(pdf_tokens, i1, i2)
-            seg["page"] = page_for_index(ranges, i1)
+            seg["page"] = page_for_index(ranges, i1, range_starts)
             seg["token_count"] = i2 - i1
             missing_segments.append(seg)
         if tag in ("insert", "replace") and j2 > j1:
@@ -124,6 +335,7 @@ def review_pdf_epub(
             seg["page"] = None
             seg["token_count"] = j2 - j1
             extra_segments.append(seg)
+    coverage = (matched / max(len(pdf_tokens), 1)) * 100
 
     issues: list[dict] = []
     for page in pdf.pages:
@@ -150,7 +362,12 @@ def review_pdf_epub(
                 }
             )
             continue
-        ratio = SequenceMatcher(None, pdf_text, epub_page_text).ratio()
+        # Indel similarity is 2 * LCS / (len_a + len_b): difflib's ratio() formula, computed
+        # exactly and in C++. Identical pages skip it.
+        if pdf_text == epub_page_text:
+            ratio = 1.0
+        else:
+            ratio = Indel.normalized_similarity(pdf_text, epub_page_text)
         status = "ok" if ratio >= page_threshold else "low_coverage"
         issues.append(
             {
@@ -170,22 +387,29 @@ def review_pdf_epub(
         "image_count_pdf": image_count_pdf,
         "image_count_epub": image_count_epub,
         "issues": issues,
-        "visual_qa": build_visual_qa(pdf_path, epub_path),
+        "visual_qa": build_visual_qa(pdf_path, book),
     }
     return report
 
 
 def collect_fixed_layout_images(book: epub.EpubBook) -> dict[int, bytes]:
-    item_by_name = {normalize_epub_path(item.get_name()): item for item in book.get_items()}
-    page_images: dict[int, bytes] = {}
+    import ebooklib
 
+    item_by_name: dict[str, epub.EpubItem] = {}
+    documents: list[tuple[str, epub.EpubItem]] = []
     for item in book.get_items():
-        if item.get_type() != ebooklib.ITEM_DOCUMENT:
-            continue
-        doc_name = normalize_epub_path(item.get_name())
+        name = normalize_epub_path(item.get_name())
+        item_by_name[name] = item
+        if item.get_type() == ebooklib.ITEM_DOCUMENT:
+            documents.append((name, item))
+    page_images: dict[int, bytes] = {}
+
+    for doc_name, item in documents:
         doc_dir = posixpath.dirname(doc_name)
-        soup = BeautifulSoup(item.get_content(), "html.parser")
-        for img in soup.find_all("img"):
+        root = parse_epub_document(item.get_content())
+        if root is None:
+            continue
+        for img in root.iter("img"):
             page_attr = img.get("data-pdf-page")
             src = img.get("src")
             if not page_attr or not src:
@@ -194,7 +418,7 @@ def collect_fixed_layout_images(book: epub.EpubBook) -> dict[int, bytes]:
                 page_num = int(page_attr)
             except ValueError:
                 continue
-            resolved = normalize_epub_path(posixpath.join(doc_dir, src))
+            resolved = _resolve_epub_href(doc_dir, src)
             img_item = item_by_name.get(resolved)
             if img_item and page_num not in page_images:
                 page_images[page_num] = img_item.get_content()
@@ -206,33 +430,69 @@ def collect_fixed_layout_images(book: epub.EpubBook) -> dict[int, bytes]:
         if not item.media_type or not item.media_type.startswith("image/"):
             continue
         name = normalize_epub_path(item.get_name())
-        match = re.match(r"^fixed_pages/page_(\d+)\.png$", name)
+        match = _FIXED_PAGE_NAME_RE.match(name)
         if not match:
             continue
         page_images[int(match.group(1))] = item.get_content()
     return page_images
 
 
-def build_visual_qa(pdf_path: Path, epub_path: Path) -> dict:
+def _visual_mean_errors(
+    doc: fitz.Document, pages: list[tuple[int, bytes]], dpi: int
+) -> list[float]:
+    import fitz
+    import numpy as np
+    from PIL import Image
+
+    mean_errors: list[float] = []
+    for page_num, epub_image in pages:
+        # MuPDF renders straight to one gray channel: no RGB buffer, no PIL conversion.
+        pdf_pix = doc.load_page(page_num - 1).get_pixmap(
+            dpi=dpi, alpha=False, colorspace=fitz.csGRAY
+        )
+        size = (pdf_pix.width, pdf_pix.height)
+        pdf_arr = np.frombuffer(pdf_pix.samples, dtype=np.uint8).reshape(size[1], size[0])
+
+        with Image.open(io.BytesIO(epub_image)) as epub_img_raw:
+            epub_img = epub_img_raw.convert("L")
+        if epub_img.size != size:
+            epub_img = epub_img.resize(size, Image.Resampling.LANCZOS)
+        # One vectorized |a - b| mean instead of a difference image plus ImageStat.
+        pdf_arr = pdf_arr.astype(np.int16)
+        mean_errors.append(float(np.abs(pdf_arr - np.asarray(epub_img, dtype=np.int16)).mean()))
+    return mean_errors
+
+
+def _visual_mean_errors_range(
+    pdf_path: Path, pages: list[tuple[int, bytes]], dpi: int
+) -> list[float]:
+    # Runs in a worker process: fitz documents cannot be shared, so each range reopens it.
+    import fitz
+
+    with fitz.open(pdf_path) as doc:
+        return _visual_mean_errors(doc, pages, dpi)
+
+
+def build_visual_qa(pdf_path: Path, book: epub.EpubBook) -> dict:
     if not env_flag("PDF2EPUB_QA_VISUAL", False):
         return {
             "status": "not_implemented",
             "notes": "Defina PDF2EPUB_QA_VISUAL=1 para comparar visualmente PDF e EPUB.",
         }
 
-    try:
-        from PIL import Image, ImageChops, ImageStat
-    except Exception:
+    # Only checked here; the page comparison imports them where it runs (maybe a worker).
+    if find_spec("PIL") is None or find_spec("numpy") is None:
         return {
             "status": "dependency_missing",
-            "notes": "Instale Pillow para QA visual: pip install -e \".[ocr]\"",
+            "notes": "Instale Pillow e NumPy para QA visual: pip install -e \".[ocr]\"",
         }
 
     threshold = float(os.getenv("PDF2EPUB_QA_VISUAL_THRESHOLD", "0.985"))
     max_pages = int(os.getenv("PDF2EPUB_QA_VISUAL_MAX_PAGES", "10"))
     dpi = int(os.getenv("PDF2EPUB_QA_VISUAL_DPI", "144"))
 
-    book = epub.read_epub(str(epub_path))
+    import fitz
+
     page_images = collect_fixed_layout_images(book)
     if not page_images:
         return {
@@ -240,28 +500,33 @@ def build_visual_qa(pdf_path: Path, epub_path: Path) -> dict:
             "notes": "Comparacao visual completa exige EPUB fixed-layout gerado pelo conversor.",
         }
 
-    doc = fitz.open(pdf_path)
+    with fitz.open(pdf_path) as doc:
+        compared: list[tuple[int, bytes]] = []
+        for page_num in sorted(page_images):
+            if page_num > len(doc):
+                continue
+            if page_num > max_pages:
+                break
+            compared.append((page_num, page_images[page_num]))
+        workers = _visual_workers(len(compared))
+        if workers == 1:
+            mean_errors = _visual_mean_errors(doc, compared, dpi)
+
+    if workers > 1:
+        # Render, decode and diff of each page are independent; run page ranges in processes.
+        step = -(-len(compared) // workers)
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        ) as pool:
+            futures = [
+                pool.submit(_visual_mean_errors_range, pdf_path, compared[i : i + step], dpi)
+                for i in range(0, len(compared), step)
+            ]
+            mean_errors = [error for future in futures for error in future.result()]
+
     page_diffs: list[dict] = []
     scores: list[float] = []
-    for page_num in sorted(page_images):
-        if page_num > len(doc):
-            continue
-        if page_num > max_pages:
-            break
-
-        pdf_page = doc.load_page(page_num - 1)
-        pdf_pix = pdf_page.get_pixmap(dpi=dpi, alpha=False)
-        pdf_bytes = pdf_pix.tobytes("png")
-
-        with Image.open(io.BytesIO(pdf_bytes)) as pdf_img_raw:
-            with Image.open(io.BytesIO(page_images[page_num])) as epub_img_raw:
-                pdf_img = pdf_img_raw.convert("L")
-                epub_img = epub_img_raw.convert("L")
-                if epub_img.size != pdf_img.size:
-                    epub_img = epub_img.resize(pdf_img.size, Image.Resampling.LANCZOS)
-                diff = ImageChops.difference(pdf_img, epub_img)
-                mean_error = ImageStat.Stat(diff).mean[0]
-
+    for (page_num, _), mean_error in zip(compared, mean_errors):
         score = max(0.0, 1.0 - (mean_error / 255.0))
         scores.append(score)
         page_diffs.append(
@@ -273,7 +538,6 @@ def build_visual_qa(pdf_path: Path, epub_path: Path) -> dict:
             }
         )
 
-    doc.close()
     if not scores:
         return {
             "status": "no_pages",
@@ -1,7 +1,20 @@
 from __future__ import annotations
 
+from operator import itemgetter
+
 from .utils import limit_text
 
+_REPORT_DEFAULTS = {
+    "issues": [],
+    "coverage_text_percent": 0.0,
+    "image_count_pdf": 0,
+    "image_count_epub": 0,
+    "missing_segments": [],
+    "extra_segments": [],
+    "visual_qa": {},
+}
+_report_fields = itemgetter(*_REPORT_DEFAULTS)
+
 
 def _compact_page_list(pages: list[int], max_items: int = 10) -> str:
     clean_pages = sorted({int(p) for p in pages if isinstance(p, int)})
@@ -30,31 +43,47 @@ def _segment_examples(segments: list[dict], max_items: int = 3) -> list[str]:
 
 
 def build_user_summary(report: dict) -> dict:
-    issues = report.get("issues", [])
-    non_ok = [item for item in issues if item.get("status") != "ok"]
-    no_text_pages = [item.get("page") for item in issues if item.get("status") == "no_text"]
-    low_coverage_pages = [
-        item.get("page") for item in issues if item.get("status") == "low_coverage"
-    ]
-    missing_page_pages = [
-        item.get("page") for item in issues if item.get("status") == "missing_page"
-    ]
-
-    coverage = float(report.get("coverage_text_percent", 0.0))
-    image_pdf = int(report.get("image_count_pdf", 0))
-    image_epub = int(report.get("image_count_epub", 0))
+    (
+        issues,
+        coverage,
+        image_pdf,
+        image_epub,
+        missing_segments,
+        extra_segments,
+        visual_qa,
+    ) = _report_fields({**_REPORT_DEFAULTS, **report})
+    non_ok_count = 0
+    no_text_pages: list[int] = []
+    low_coverage_pages: list[int] = []
+    missing_page_pages: list[int] = []
+    pages_by_status = {
+        "no_text": no_text_pages,
+        "low_coverage": low_coverage_pages,
+        "missing_page": missing_page_pages,
+    }
+    for item in issues:
+        issue_status = item.get("status")
+        if issue_status == "ok":
+            continue
+        non_ok_count += 1
+        bucket = pages_by_status.get(issue_status)
+        if bucket is not None:
+            bucket.append(item.get("page"))
+
+    coverage = float(coverage)
+    # Reports carry two decimals, so hundredths compare exactly as integers.
+    coverage_x100 = int(coverage * 100)
+    image_pdf = int(image_pdf)
+    image_epub = int(image_epub)
     image_match = image_pdf == image_epub
-    missing_segments = report.get("missing_segments", [])
-    extra_segments = report.get("extra_segments", [])
 
-    visual_qa = report.get("visual_qa", {})
     visual_status = visual_qa.get("status", "not_implemented")
     visual_percent = visual_qa.get("coverage_visual_percent")
 
-    if coverage >= 98 and len(non_ok) == 0 and image_match:
+    if coverage_x100 >= 9800 and non_ok_count == 0 and image_match:
         status = "excelente"
         message = "Conversao muito fiel ao arquivo original."
-    elif coverage >= 95 and image_match:
+    elif coverage_x100 >= 9500 and image_match:
         status = "bom"
         message = "Conversao boa, com pequenas diferencas em algumas paginas."
     else:
@@ -72,7 +101,7 @@ def build_user_summary(report: dict) -> dict:
     explicacao = [
         f"Texto aproveitado: {coverage:.2f}% do conteudo do PDF apareceu no EPUB.",
         f"Imagens: {image_epub} no EPUB para {image_pdf} no PDF.",
-        f"Paginas com alerta: {len(non_ok)} de {len(issues)}.",
+        f"Paginas com alerta: {non_ok_count} de {len(issues)}.",
         (
             "Diferencas de texto detectadas: "
             f"{len(missing_segments)} trechos possivelmente faltando "
@@ -131,7 +160,7 @@ def build_user_summary(report: dict) -> dict:
         "imagens_pdf": image_pdf,
         "imagens_epub": image_epub,
         "paginas_total": len(issues),
-        "paginas_com_alerta": len(non_ok),
+        "paginas_com_alerta": non_ok_count,
         "paginas_sem_texto": no_text_pages[:20],
         "paginas_baixa_cobertura": low_coverage_pages[:20],
         "paginas_sem_ancora": missing_page_pages[:20],
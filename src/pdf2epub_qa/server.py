@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+import os
+
+import uvicorn
+
+from .utils import SERVER_WORKERS_ENV
+
+
+def main() -> None:
+    uvicorn.run(
+        "pdf2epub_qa.api:app",
+        host=os.getenv("PDF2EPUB_QA_HOST", "127.0.0.1"),
+        port=int(os.getenv("PDF2EPUB_QA_PORT", "8000")),
+        # One worker by default: its process pool already runs a conversion per core.
+        workers=int(os.getenv(SERVER_WORKERS_ENV, "1")),
+        loop="auto",
+        http="auto",
+    )
+
+
+if __name__ == "__main__":
+    main()
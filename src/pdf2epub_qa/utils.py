@@ -1,15 +1,50 @@
 from __future__ import annotations
 
+import functools
 import os
 import re
 import unicodedata
+from typing import Any
+
+import orjson
 
 
 def normalize_text(text: str) -> str:
-    text = unicodedata.normalize("NFKC", text)
-    text = text.lower()
-    text = re.sub(r"\s+", " ", text)
-    return text.strip()
+    # split() collapses and strips whitespace in one C pass, same as \s+ plus strip().
+    return " ".join(unicodedata.normalize("NFKC", text).lower().split())
+
+
+def dump_json(data: Any, pretty: bool = True) -> bytes:
+    option = orjson.OPT_NON_STR_KEYS
+    if pretty:
+        option |= orjson.OPT_INDENT_2
+    return orjson.dumps(data, option=option)
+
+
+def write_json(path: str | os.PathLike[str], data: Any, pretty: bool = True) -> None:
+    # Plain open/write/close: no buffered-file object, no size probe before writing.
+    payload = memoryview(dump_json(data, pretty=pretty))
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+    fd = os.open(path, flags, 0o644)
+    try:
+        while payload:
+            payload = payload[os.write(fd, payload) :]
+    finally:
+        os.close(fd)
+
+
+FIXED_WORKERS_ENV = "PDF2EPUB_QA_FIXED_WORKERS"
+OCR_WORKERS_ENV = "PDF2EPUB_QA_OCR_WORKERS"
+REVIEW_WORKERS_ENV = "PDF2EPUB_QA_REVIEW_WORKERS"
+SERVER_WORKERS_ENV = "PDF2EPUB_QA_WORKERS"
+
+
+def single_render_worker() -> None:
+    # Initializer for pools that already run one conversion per core: a nested page-render,
+    # OCR or review pool inside each child would only oversubscribe the CPUs.
+    os.environ.setdefault(FIXED_WORKERS_ENV, "1")
+    os.environ.setdefault(OCR_WORKERS_ENV, "1")
+    os.environ.setdefault(REVIEW_WORKERS_ENV, "1")
 
 
 def env_flag(name: str, default: bool = False) -> bool:
@@ -19,15 +54,26 @@ def env_flag(name: str, default: bool = False) -> bool:
     return value.strip().lower() in {"1", "true", "yes", "on"}
 
 
+# Built once at import: these run for every page of every conversion.
+_HYPHEN_BREAK_RE = re.compile(r"-\n(?=\w)")
+_BLANK_LINE_RE = re.compile(r"\n\s*\n")
+_TOKEN_RE = re.compile(r"[\w']+")
+_HEADING_KEYWORD_RE = re.compile(
+    r"^(cap[ií]tulo|chapter|parte|part|section|seção|secao|livro|book)\b"
+    r"|^(appendix|apêndice|apendice)\b",
+    flags=re.IGNORECASE,
+)
+
+
 def clean_text(text: str) -> str:
     text = text.replace("\r\n", "\n").replace("\r", "\n")
-    text = re.sub(r"-\n(?=\w)", "", text)
+    text = _HYPHEN_BREAK_RE.sub("", text)
     return text
 
 
 def text_to_paragraphs(text: str) -> list[str]:
     text = clean_text(text)
-    blocks = re.split(r"\n\s*\n", text.strip())
+    blocks = _BLANK_LINE_RE.split(text.strip())
     paragraphs: list[str] = []
     for block in blocks:
         lines = [ln.strip() for ln in block.splitlines() if ln.strip()]
@@ -38,10 +84,6 @@ def text_to_paragraphs(text: str) -> list[str]:
 
 
 def detect_heading(text: str) -> str | None:
-    heading_patterns = (
-        r"^(cap[ií]tulo|chapter|parte|part|section|seção|secao|livro|book)\b",
-        r"^(appendix|apêndice|apendice)\b",
-    )
     max_lines = 6
     checked = 0
     candidates: list[tuple[int, str]] = []
@@ -55,21 +97,27 @@ def detect_heading(text: str) -> str | None:
             break
         if len(line) > 80:
             continue
-        letters = [c for c in line if c.isalpha()]
-        if len(letters) < 4:
+        # Letter, uppercase and digit counts in a single pass over the line.
+        letters = upper = digits = 0
+        for c in line:
+            if c.isalpha():
+                letters += 1
+                if c.isupper():
+                    upper += 1
+            elif c.isdigit():
+                digits += 1
+        if letters < 4:
             continue
-        upper_ratio = sum(c.isupper() for c in letters) / len(letters)
-        words = [w for w in re.split(r"\s+", line) if w]
+        upper_ratio = upper / letters
+        words = line.split()
         title_ratio = sum(1 for w in words if w[0].isupper()) / max(len(words), 1)
-        digit_ratio = sum(c.isdigit() for c in line) / max(len(line), 1)
+        digit_ratio = digits / max(len(line), 1)
         if digit_ratio > 0.3:
             continue
 
         score = 0
-        for pattern in heading_patterns:
-            if re.match(pattern, line, flags=re.IGNORECASE):
-                score += 3
-                break
+        if _HEADING_KEYWORD_RE.match(line):
+            score += 3
         if upper_ratio >= 0.6:
             score += 1
         if title_ratio >= 0.8:
@@ -86,12 +134,23 @@ def detect_heading(text: str) -> str | None:
         return None
     candidates.sort(key=lambda item: (-item[0], len(item[1])))
     return candidates[0][1]
-    return None
+
+
+# Hits come from paragraphs that are identical on the PDF and the EPUB side of one review;
+# review_pdf_epub clears it once both sides are tokenized, so long-lived pool workers do
+# not keep text from books they already finished.
+@functools.lru_cache(maxsize=4096)
+def _tokenize_cached(text: str) -> tuple[str, ...]:
+    return tuple(_TOKEN_RE.findall(normalize_text(text)))
 
 
 def tokenize(text: str) -> list[str]:
-    text = normalize_text(text)
-    return re.findall(r"[\w']+", text, flags=re.UNICODE)
+    # The cache holds tuples so a caller mutating its list cannot change later results.
+    return list(_tokenize_cached(text))
+
+
+def clear_tokenize_cache() -> None:
+    _tokenize_cached.cache_clear()
 
 
 def limit_text(text: str, max_len: int = 200) -> str:
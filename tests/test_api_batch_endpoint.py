@@ -1,11 +1,11 @@
 import asyncio
 import io
 import json
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from uuid import uuid4
 
 import fitz
-from fastapi import UploadFile
+from fastapi import BackgroundTasks, UploadFile
 
 import pdf2epub_qa.api as api_module
 
@@ -19,15 +19,21 @@ def make_pdf_bytes(text: str) -> bytes:
     return data
 
 
-def make_run_dir() -> Path:
-    run_dir = Path("tests_runtime") / f"api-batch-{uuid4().hex[:8]}"
-    run_dir.mkdir(parents=True, exist_ok=False)
-    return run_dir
+class RecordingPool(ThreadPoolExecutor):
+    def __init__(self) -> None:
+        super().__init__(max_workers=2)
+        self.submitted = 0
 
+    def submit(self, *args, **kwargs):
+        self.submitted += 1
+        return super().submit(*args, **kwargs)
 
-def test_batch_convert_upload_endpoint(monkeypatch):
-    run_dir = make_run_dir()
-    monkeypatch.setattr(api_module, "OUTPUT_DIR", run_dir)
+
+def test_batch_convert_upload_endpoint(tmp_path, monkeypatch):
+    monkeypatch.setattr(api_module, "OUTPUT_DIR", tmp_path)
+    # The batch runs on the server's shared pool instead of starting its own.
+    shared_pool = RecordingPool()
+    monkeypatch.setattr(api_module, "_process_pool", lambda: shared_pool)
 
     uploads = [
         UploadFile(filename="ok-1.pdf", file=io.BytesIO(make_pdf_bytes("PDF 1"))),
@@ -37,6 +43,7 @@ def test_batch_convert_upload_endpoint(monkeypatch):
 
     response = asyncio.run(
         api_module.batch_convert_upload_endpoint(
+            background_tasks=BackgroundTasks(),
             pdfs=uploads,
             lang="pt-BR",
             layout="reflow",
@@ -51,4 +58,16 @@ def test_batch_convert_upload_endpoint(monkeypatch):
     assert payload["summary"]["total"] == 2
     assert payload["summary"]["sucesso"] == 2
     assert payload["summary"]["erros"] == 0
+    assert shared_pool.submitted == 2
+    shared_pool.shutdown()
     assert payload["files"]["report_download_url"].startswith("/outputs/")
+
+    zip_path = Path(payload["files"]["run_dir"]) / payload["files"]["zip_name"]
+    assert not zip_path.exists()
+    asyncio.run(response.background())
+    assert zip_path.exists()
+
+    report_path = Path(payload["files"]["run_dir"]) / payload["files"]["report_name"]
+    report = json.loads(report_path.read_text(encoding="utf-8"))
+    assert [row["input_name"] for row in report["results"]] == ["ok-1.pdf", "ok-2.pdf"]
+    assert report["results"][0]["output_epub_url"].startswith("/outputs/")
@@ -0,0 +1,167 @@
+import io
+import json
+import os
+import tempfile
+import zipfile
+
+from fastapi import UploadFile
+
+import pdf2epub_qa.api as api_module
+
+
+def test_safe_stem_strips_accents_and_symbols():
+    assert api_module._safe_stem("Meu Livro Ação (v2).pdf") == "Meu-Livro-Acao-v2"
+
+
+def test_safe_stem_fallback_for_empty_result():
+    assert api_module._safe_stem("###.pdf") == "arquivo"
+    assert api_module._safe_stem("日本語.pdf") == "arquivo"
+
+
+def test_safe_stem_folds_characters_outside_table():
+    assert api_module._safe_stem("ﬁnal ＡBC.pdf") == "final-ABC"
+
+
+def test_pool_workers_split_cores_between_server_workers(monkeypatch):
+    monkeypatch.setattr(os, "cpu_count", lambda: 16)
+    monkeypatch.delenv("PDF2EPUB_QA_WORKERS", raising=False)
+    assert api_module._pool_workers() == 16
+    monkeypatch.setenv("PDF2EPUB_QA_WORKERS", "4")
+    assert api_module._pool_workers() == 4
+    monkeypatch.setenv("PDF2EPUB_QA_WORKERS", "32")
+    assert api_module._pool_workers() == 1
+
+
+def test_output_files_returns_304_for_matching_etag(tmp_path):
+    target = tmp_path / "book.epub"
+    target.write_bytes(b"epub")
+    files = api_module.OutputFiles(directory=str(tmp_path))
+    stat_result = os.stat(target)
+
+    first = files.file_response(target, stat_result, {"type": "http", "headers": []})
+    assert first.status_code == 200
+    assert first.chunk_size == api_module.DOWNLOAD_CHUNK_SIZE
+
+    etag = first.headers["etag"].encode()
+    scope = {"type": "http", "headers": [(b"if-none-match", etag)]}
+    second = files.file_response(target, stat_result, scope)
+    assert second.status_code == 304
+
+
+def test_iter_report_json_round_trips(monkeypatch):
+    monkeypatch.setattr(api_module, "REPORT_ISSUES_CHUNK", 2)
+    issues = [{"page": page, "status": "ok"} for page in range(1, 6)]
+    report = {"coverage_text_percent": 99.5, "issues": issues, "visual_qa": {"status": "ok"}}
+    assert json.loads(b"".join(api_module._iter_report_json(report))) == report
+    assert json.loads(b"".join(api_module._iter_report_json({}))) == {"issues": []}
+
+
+def test_work_dirs_are_emptied_and_reused():
+    work_dir = api_module._acquire_work_dir()
+    (work_dir / "input.pdf").write_bytes(b"%PDF-")
+    api_module._release_work_dir(work_dir)
+    assert list(work_dir.iterdir()) == []
+    assert api_module._acquire_work_dir() == work_dir
+    api_module._release_work_dir(work_dir)
+
+
+def test_release_work_dir_unlinks_only_listed_files():
+    work_dir = api_module._acquire_work_dir()
+    pdf_path = work_dir / "input.pdf"
+    pdf_path.write_bytes(b"%PDF-")
+    api_module._release_work_dir(work_dir, pdf_path, work_dir / "output.epub")
+    assert not pdf_path.exists()
+    assert api_module._acquire_work_dir() == work_dir
+    api_module._release_work_dir(work_dir)
+
+
+def test_has_pdf_magic_peeks_without_consuming():
+    upload = UploadFile(filename="ok.pdf", file=io.BytesIO(b"%PDF-1.7\n..."))
+    assert api_module._has_pdf_magic(upload) is True
+    assert upload.file.read() == b"%PDF-1.7\n..."
+    fake = UploadFile(filename="fake.pdf", file=io.BytesIO(b"nao e um pdf"))
+    assert api_module._has_pdf_magic(fake) is False
+
+
+def test_save_upload_publishes_complete_file(tmp_path):
+    target = tmp_path / "input.pdf"
+    upload = UploadFile(filename="input.pdf", file=io.BytesIO(b"%PDF-1.7 conteudo"))
+    api_module._save_upload(upload, target)
+    assert target.read_bytes() == b"%PDF-1.7 conteudo"
+    assert [path.name for path in tmp_path.iterdir()] == ["input.pdf"]
+
+
+def test_zip_epubs_stores_entries_uncompressed(tmp_path):
+    epub_dir = tmp_path / "epubs"
+    epub_dir.mkdir(parents=True, exist_ok=False)
+    (epub_dir / "b.epub").write_bytes(b"segundo")
+    (epub_dir / "a.epub").write_bytes(b"primeiro")
+    (epub_dir / "notas.txt").write_bytes(b"ignorar")
+    zip_path = tmp_path / "batch-epubs.zip"
+
+    assert api_module._zip_epubs(epub_dir, zip_path) is True
+    with zipfile.ZipFile(zip_path) as zf:
+        infos = zf.infolist()
+        assert [info.filename for info in infos] == ["a.epub", "b.epub"]
+        assert all(info.compress_type == zipfile.ZIP_STORED for info in infos)
+        assert zf.read("a.epub") == b"primeiro"
+
+
+def test_zip_epubs_copies_large_entries_intact(tmp_path):
+    epub_dir = tmp_path / "epubs"
+    epub_dir.mkdir(parents=True, exist_ok=False)
+    payload = os.urandom(api_module.ZIP_MMAP_MIN_SIZE + api_module.ZIP_WRITE_CHUNK_SIZE + 7)
+    (epub_dir / "grande.epub").write_bytes(payload)
+    zip_path = tmp_path / "batch-epubs.zip"
+
+    assert api_module._zip_epubs(epub_dir, zip_path) is True
+    with zipfile.ZipFile(zip_path) as zf:
+        assert zf.getinfo("grande.epub").compress_type == zipfile.ZIP_STORED
+        assert zf.read("grande.epub") == payload
+
+
+def test_save_upload_copies_disk_backed_upload(tmp_path):
+    target = tmp_path / "input.pdf"
+    with tempfile.TemporaryFile() as spooled:
+        spooled.write(b"%PDF-1.7 " + b"x" * 4096)
+        spooled.seek(0)
+        api_module._save_upload(UploadFile(filename="input.pdf", file=spooled), target)
+    assert target.read_bytes() == b"%PDF-1.7 " + b"x" * 4096
+
+
+def test_save_batch_uploads_dedupes_names_case_insensitively(tmp_path):
+    names = ["Livro.pdf", "livro.pdf", "LIVRO.PDF", "livro-1.pdf", "notas.txt"]
+    uploads = [UploadFile(filename=name, file=io.BytesIO(b"%PDF-")) for name in names]
+
+    saved_paths, original_by_saved = api_module._save_batch_uploads(uploads, tmp_path)
+
+    assert [path.name for path in saved_paths] == [
+        "Livro.pdf",
+        "livro-1.pdf",
+        "LIVRO-2.pdf",
+        "livro-1-1.pdf",
+    ]
+    assert original_by_saved[str(tmp_path / "LIVRO-2.pdf")] == "LIVRO.PDF"
+
+
+def test_save_batch_uploads_skips_files_without_pdf_header(tmp_path):
+    uploads = [
+        UploadFile(filename="real.pdf", file=io.BytesIO(b"%PDF-1.7")),
+        UploadFile(filename="fake.pdf", file=io.BytesIO(b"nao e um pdf")),
+    ]
+
+    saved_paths, _ = api_module._save_batch_uploads(uploads, tmp_path)
+
+    assert [path.name for path in saved_paths] == ["real.pdf"]
+    assert not (tmp_path / "fake.pdf").exists()
+
+
+def test_orjson_response_accepts_integer_keys():
+    response = api_module.ORJSONResponse(content={"paginas": {1: "ok"}})
+    assert json.loads(response.body) == {"paginas": {"1": "ok"}}
+
+
+def test_output_url_is_relative_to_output_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(api_module, "OUTPUT_DIR", tmp_path / "saidas")
+    nested = tmp_path / "saidas" / "batch-1" / "epubs" / "livro.epub"
+    assert api_module._output_url(nested) == "/outputs/batch-1/epubs/livro.epub"
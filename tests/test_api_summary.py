@@ -55,3 +55,11 @@ def test_format_user_summary_text():
     assert "O que fazer agora" not in rendered
     assert "Recomendacoes:" in rendered
     assert "Faltando: Pagina 10: \"abc\"" in rendered
+
+
+def test_build_user_summary_threshold_boundaries():
+    base = {"image_count_pdf": 0, "image_count_epub": 0, "issues": [{"page": 1, "status": "ok"}]}
+    expected = {98.0: "excelente", 97.99: "bom", 95.0: "bom", 94.99: "revisar"}
+    for coverage, status in expected.items():
+        summary = build_user_summary({**base, "coverage_text_percent": coverage})
+        assert summary["status_geral"] == status
@@ -0,0 +1,31 @@
+import asyncio
+
+from starlette.requests import Request
+
+import pdf2epub_qa.api as api_module
+
+
+def make_request(headers: dict[str, str] | None = None) -> Request:
+    raw_headers = [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw_headers})
+
+
+def test_ui_serves_cached_html_with_etag():
+    response = asyncio.run(api_module.ui(make_request()))
+    assert response.status_code == 200
+    assert response.body == api_module._UI_HTML_BYTES
+    assert response.headers["etag"] == api_module._UI_ETAG
+    assert "max-age" in response.headers["cache-control"]
+
+
+def test_ui_returns_304_when_etag_matches():
+    request = make_request({"If-None-Match": api_module._UI_ETAG})
+    response = asyncio.run(api_module.ui(request))
+    assert response.status_code == 304
+    assert response.body == b""
+
+
+def test_ui_matches_weak_and_listed_etags():
+    request = make_request({"If-None-Match": f'"outro", W/{api_module._UI_ETAG}'})
+    response = asyncio.run(api_module.ui(request))
+    assert response.status_code == 304
@@ -1,10 +1,14 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from uuid import uuid4
 
 import fitz
+import pytest
 from typer.testing import CliRunner
 
-from pdf2epub_qa.batch import convert_pdfs_batch
+import pdf2epub_qa.batch as batch_module
+from pdf2epub_qa.batch import convert_pdfs_batch, discover_pdf_inputs
 from pdf2epub_qa.cli import app
 
 
@@ -16,22 +20,15 @@ def create_sample_pdf(path: Path, text: str) -> None:
     doc.close()
 
 
-def make_run_dir() -> Path:
-    run_dir = Path("tests_runtime") / f"batch-{uuid4().hex[:8]}"
-    run_dir.mkdir(parents=True, exist_ok=False)
-    return run_dir
+def test_batch_convert_with_failure_report(tmp_path):
+    output_dir = tmp_path / "epubs"
 
-
-def test_batch_convert_with_failure_report():
-    run_dir = make_run_dir()
-    output_dir = run_dir / "epubs"
-
-    create_sample_pdf(run_dir / "ok-1.pdf", "Primeiro PDF")
-    create_sample_pdf(run_dir / "ok-2.pdf", "Segundo PDF")
-    (run_dir / "quebrado.pdf").write_text("nao e um pdf valido", encoding="utf-8")
+    create_sample_pdf(tmp_path / "ok-1.pdf", "Primeiro PDF")
+    create_sample_pdf(tmp_path / "ok-2.pdf", "Segundo PDF")
+    (tmp_path / "quebrado.pdf").write_text("nao e um pdf valido", encoding="utf-8")
 
     report = convert_pdfs_batch(
-        input_paths=[run_dir],
+        input_paths=[tmp_path],
         output_dir=output_dir,
         workers=2,
         recursive=True,
@@ -43,22 +40,33 @@ def test_batch_convert_with_failure_report():
     assert len(report["failed_pdfs"]) == 1
     assert output_dir.joinpath("ok-1.epub").exists()
     assert output_dir.joinpath("ok-2.epub").exists()
-
-
-def test_batch_convert_cli_writes_retry_json():
-    run_dir = make_run_dir()
-    output_dir = run_dir / "epubs"
-    report_path = run_dir / "batch-report.json"
-
-    create_sample_pdf(run_dir / "ok.pdf", "PDF de teste")
-    (run_dir / "erro.pdf").write_text("invalido", encoding="utf-8")
+    first = report["results"][0]
+    assert list(first) == [
+        "input_pdf",
+        "output_epub",
+        "status",
+        "error",
+        "pages",
+        "images",
+        "sections",
+    ]
+    assert first["status"] == "ok"
+    assert first["pages"] == 1
+
+
+def test_batch_convert_cli_writes_retry_json(tmp_path):
+    output_dir = tmp_path / "epubs"
+    report_path = tmp_path / "batch-report.json"
+
+    create_sample_pdf(tmp_path / "ok.pdf", "PDF de teste")
+    (tmp_path / "erro.pdf").write_text("invalido", encoding="utf-8")
 
     runner = CliRunner()
     result = runner.invoke(
         app,
         [
             "batch-convert",
-            str(run_dir),
+            str(tmp_path),
             "--output-dir",
             str(output_dir),
             "--report",
@@ -71,3 +79,156 @@ def test_batch_convert_cli_writes_retry_json():
     assert result.exit_code == 0
     assert report_path.exists()
     assert report_path.with_suffix(".retry.json").exists()
+
+
+@pytest.mark.slow
+def test_process_executor_converts_in_child_process(tmp_path):
+    pdf_path = tmp_path / "processo.pdf"
+    create_sample_pdf(pdf_path, "PDF em outro processo")
+
+    with batch_module._make_executor(batch_module.EXECUTOR_PROCESS, 2) as pool:
+        assert isinstance(pool, ProcessPoolExecutor)
+        item = pool.submit(
+            batch_module._convert_one,
+            pdf_path,
+            tmp_path / "processo.epub",
+            True,
+            None,
+            "pt-BR",
+            "reflow",
+        ).result()
+
+    assert item.status == "ok"
+    assert (tmp_path / "processo.epub").exists()
+
+
+def test_batch_convert_rejects_unknown_executor(tmp_path):
+    with pytest.raises(RuntimeError):
+        convert_pdfs_batch(input_paths=[], output_dir=tmp_path, executor="gpu")
+
+
+def test_largest_first_orders_by_file_size(tmp_path):
+    small = tmp_path / "pequeno.pdf"
+    large = tmp_path / "grande.pdf"
+    small.write_bytes(b"%PDF-" + b"x" * 10)
+    large.write_bytes(b"%PDF-" + b"x" * 1000)
+
+    files = [small, tmp_path / "sumiu.pdf", large]
+    assert batch_module._largest_first(files, batch_module._file_sizes(files)) == [
+        large,
+        small,
+        tmp_path / "sumiu.pdf",
+    ]
+
+
+def test_discover_pdf_inputs_scans_and_dedupes(tmp_path):
+    nested = tmp_path / "sub"
+    nested.mkdir()
+    (tmp_path / "a.PDF").write_bytes(b"%PDF-")
+    (tmp_path / ".pdf").write_bytes(b"%PDF-")
+    (tmp_path / "notas.txt").write_bytes(b"x")
+    (nested / "b.pdf").write_bytes(b"%PDF-")
+
+    found = discover_pdf_inputs([tmp_path, tmp_path / "a.PDF"])
+    assert [path.name for path in found] == ["a.PDF", "b.pdf"]
+    shallow = discover_pdf_inputs([tmp_path], recursive=False)
+    assert [path.name for path in shallow] == ["a.PDF"]
+
+
+def test_discover_pdf_inputs_dedupes_symlinked_files(tmp_path):
+    target = tmp_path / "livro.pdf"
+    target.write_bytes(b"%PDF-")
+    link = tmp_path / "atalho.pdf"
+    try:
+        link.symlink_to(target)
+    except OSError:
+        pytest.skip("symlinks indisponiveis neste sistema")
+
+    found = discover_pdf_inputs([target, link, Path(str(tmp_path) + "/./livro.pdf")])
+    assert len(found) == 1
+
+
+def test_auto_workers_follows_pdf_sizes(monkeypatch):
+    monkeypatch.setattr(batch_module.os, "cpu_count", lambda: 8)
+    mib = 1024 * 1024
+
+    assert batch_module._auto_workers([5 * mib] * 3) == 4
+    assert batch_module._auto_workers([mib // 2] * 16) == 8
+    assert batch_module._auto_workers([mib // 2] * 15 + [200 * mib]) == 2
+
+
+def test_build_output_map_suffixes_repeated_stems():
+    names = ("a/report.pdf", "b/Report.pdf", "report-1.pdf", "c/report.pdf")
+    files = [Path(name) for name in names]
+
+    mapping = batch_module._build_output_map(files, Path("out"))
+
+    assert [mapping[path].name for path in files] == [
+        "report.epub",
+        "Report-1.epub",
+        "report-1-1.epub",
+        "report-2.epub",
+    ]
+
+
+def test_progress_callback_runs_off_the_collecting_thread(tmp_path):
+    create_sample_pdf(tmp_path / "a.pdf", "Primeiro PDF")
+    create_sample_pdf(tmp_path / "b.pdf", "Segundo PDF")
+    calls: list[tuple[int, int, str]] = []
+
+    def on_item_done(item, done, total):
+        calls.append((done, total, threading.current_thread().name))
+
+    convert_pdfs_batch(
+        input_paths=[tmp_path],
+        output_dir=tmp_path / "epubs",
+        workers=1,
+        on_item_done=on_item_done,
+        executor="thread",
+    )
+
+    assert [(done, total) for done, total, _ in calls] == [(1, 2), (2, 2)]
+    assert {name for _, _, name in calls} == {"batch-progress"}
+
+
+def test_thread_executor_pins_nested_render_pools(tmp_path, monkeypatch):
+    create_sample_pdf(tmp_path / "a.pdf", "Primeiro PDF")
+    create_sample_pdf(tmp_path / "b.pdf", "Segundo PDF")
+    monkeypatch.setattr(batch_module.os, "cpu_count", lambda: 4)
+    monkeypatch.delenv("PDF2EPUB_QA_FIXED_WORKERS", raising=False)
+    seen: list[str | None] = []
+    convert_one = batch_module._convert_one
+
+    def recording_convert_one(*args):
+        seen.append(os.environ.get("PDF2EPUB_QA_FIXED_WORKERS"))
+        return convert_one(*args)
+
+    monkeypatch.setattr(batch_module, "_convert_one", recording_convert_one)
+
+    convert_pdfs_batch(
+        input_paths=[tmp_path], output_dir=tmp_path / "epubs", workers=2, executor="thread"
+    )
+
+    assert seen == ["1", "1"]
+    assert "PDF2EPUB_QA_FIXED_WORKERS" not in os.environ
+
+
+def test_progress_callback_error_reaches_the_caller(tmp_path):
+    create_sample_pdf(tmp_path / "a.pdf", "Primeiro PDF")
+    create_sample_pdf(tmp_path / "b.pdf", "Segundo PDF")
+    calls: list[int] = []
+
+    def on_item_done(item, done, total):
+        calls.append(done)
+        raise ValueError("terminal fechado")
+
+    with pytest.raises(ValueError, match="terminal fechado"):
+        convert_pdfs_batch(
+            input_paths=[tmp_path],
+            output_dir=tmp_path / "epubs",
+            workers=1,
+            on_item_done=on_item_done,
+            executor="thread",
+        )
+
+    assert calls == [1, 2]
@@ -0,0 +1,35 @@
+from pdf2epub_qa.epub_builder import (
+    SectionData,
+    _escape_attr,
+    render_fixed_page,
+    render_section,
+)
+from pdf2epub_qa.pdf_extractor import ImageData, PageData
+
+
+def test_render_section_escapes_text_and_links_images():
+    image = ImageData(id="p1_img1", page_index=0, ext="png", bytes=b"")
+    page = PageData(index=0, text="Ola <mundo> & cia\n\nSegundo", images=[image])
+    section = SectionData(title="Capitulo <1>", pages=[page], file_name="chap_1.xhtml")
+
+    xhtml = render_section(section, {"p1_img1": "images/p1_img1.png"}, "pt-BR")
+
+    assert xhtml.startswith('<html xmlns="http://www.w3.org/1999/xhtml" lang="pt-BR">\n<head>')
+    assert "<title>Capitulo &lt;1&gt;</title>" in xhtml
+    assert '<h1>Capitulo &lt;1&gt;</h1>\n<a id="page-1"></a>' in xhtml
+    assert "<p>Ola &lt;mundo&gt; &amp; cia</p>\n<p>Segundo</p>" in xhtml
+    assert '<img src="images/p1_img1.png" alt="Image p1_img1"/>' in xhtml
+    assert xhtml.endswith("</body>\n</html>")
+
+
+def test_render_fixed_page_keeps_hidden_text():
+    xhtml = render_fixed_page(3, "fixed_pages/page_3.png", "Texto da pagina", "pt-BR")
+
+    assert "<title>Page 3</title>" in xhtml
+    assert 'data-pdf-page="3"' in xhtml
+    assert '<div class="pdf-text"><p>Texto da pagina</p></div>' in xhtml
+
+
+def test_escape_attr_skips_plain_tokens():
+    assert _escape_attr("images/p1_img1.png") == "images/p1_img1.png"
+    assert _escape_attr('pt"BR<') == "pt&quot;BR&lt;"
@@ -1,63 +1,142 @@
+import functools
+import zipfile
 from pathlib import Path
-from uuid import uuid4
 
 import fitz
+import pytest
+from ebooklib import epub
 
+from pdf2epub_qa import epub_builder, qa, utils
 from pdf2epub_qa.converter import convert_pdf_to_epub
 from pdf2epub_qa.qa import review_pdf_epub
 
 
-def create_sample_pdf(path):
+@functools.cache
+def sample_pdf_bytes() -> bytes:
+    # Built once per session; every test writes the same bytes to its own run dir.
     doc = fitz.open()
     page1 = doc.new_page()
     page1.insert_text((72, 72), "CAPITULO 1\nOla mundo\nLinha 2")
     page2 = doc.new_page()
     page2.insert_text((72, 72), "Continuacao do texto.\nFim.")
-    path.write_bytes(doc.tobytes())
+    data = doc.tobytes()
     doc.close()
+    return data
 
 
-def make_run_dir() -> Path:
-    run_dir = Path("tests_runtime") / f"run-{uuid4().hex[:8]}"
-    run_dir.mkdir(parents=True, exist_ok=False)
-    return run_dir
-
+def create_sample_pdf(path):
+    path.write_bytes(sample_pdf_bytes())
 
-def test_convert_and_review():
-    run_dir = make_run_dir()
-    pdf_path = run_dir / "sample.pdf"
-    epub_path = run_dir / "sample.epub"
 
+def convert_and_review_sample(run_dir: Path, layout_mode: str, title: str):
+    pdf_path = run_dir / f"sample_{layout_mode}.pdf"
+    epub_path = run_dir / f"sample_{layout_mode}.epub"
     create_sample_pdf(pdf_path)
-    result = convert_pdf_to_epub(pdf_path, epub_path, title="Teste", author="Autor", lang="pt-BR")
+    result = convert_pdf_to_epub(
+        pdf_path, epub_path, title=title, author="Autor", lang="pt-BR", layout_mode=layout_mode
+    )
+    return pdf_path, epub_path, result, review_pdf_epub(pdf_path, epub_path)
 
-    assert epub_path.exists()
 
-    report = review_pdf_epub(pdf_path, epub_path)
+# Converted and reviewed once per session; tests only read the files and the report.
+@pytest.fixture(scope="session")
+def reflow_sample(tmp_path_factory):
+    return convert_and_review_sample(tmp_path_factory.mktemp("reflow"), "reflow", "Teste")
+
+
+@pytest.fixture(scope="session")
+def fixed_sample(tmp_path_factory):
+    return convert_and_review_sample(tmp_path_factory.mktemp("fixed"), "fixed", "Teste Fixed")
+
 
+@pytest.mark.parametrize("layout_mode", ["reflow", "fixed"])
+def test_convert_and_review(request, layout_mode):
+    _, epub_path, result, report = request.getfixturevalue(f"{layout_mode}_sample")
+
+    assert epub_path.exists()
+    assert result.layout_mode == layout_mode
+    # Rendered fixed_pages/ images are not content images, so both layouts report none.
     assert report["image_count_pdf"] == 0
     assert report["image_count_epub"] == 0
     assert report["coverage_text_percent"] >= 50
     assert len(report["issues"]) == result.pages
 
 
-def test_convert_fixed_layout_and_review():
-    run_dir = make_run_dir()
-    pdf_path = run_dir / "sample_fixed.pdf"
-    epub_path = run_dir / "sample_fixed.epub"
+def test_review_leaves_no_tokenized_text_cached(reflow_sample):
+    pdf_path, epub_path, _, _ = reflow_sample
+
+    review_pdf_epub(pdf_path, epub_path)
+
+    assert utils._tokenize_cached.cache_info().currsize == 0
+
+
+@pytest.mark.slow
+def test_fixed_pages_render_in_parallel(tmp_path, monkeypatch):
+    pdf_path = tmp_path / "parallel.pdf"
+    doc = fitz.open()
+    for number in range(4):
+        doc.new_page().insert_text((72, 72), f"Pagina {number + 1}")
+    pdf_path.write_bytes(doc.tobytes())
+    doc.close()
+
+    serial = epub_builder._render_fixed_pages(pdf_path, dpi=36)
+    monkeypatch.setattr(epub_builder, "FIXED_PARALLEL_MIN_PAGES", 1)
+    monkeypatch.setenv("PDF2EPUB_QA_FIXED_WORKERS", "2")
+    assert epub_builder._fixed_render_workers(4) == 2
+    parallel = epub_builder._render_fixed_pages(pdf_path, dpi=36)
 
+    assert parallel == serial
+
+
+def test_convert_fixed_layout_with_jpeg_pages(tmp_path, monkeypatch):
+    pdf_path = tmp_path / "sample_jpg.pdf"
+    epub_path = tmp_path / "sample_jpg.epub"
     create_sample_pdf(pdf_path)
-    result = convert_pdf_to_epub(
-        pdf_path,
-        epub_path,
-        title="Teste Fixed",
-        author="Autor",
-        lang="pt-BR",
-        layout_mode="fixed",
-    )
+    monkeypatch.setenv("PDF2EPUB_QA_FIXED_FORMAT", "jpg")
 
-    assert epub_path.exists()
-    assert result.layout_mode == "fixed"
+    convert_pdf_to_epub(pdf_path, epub_path, lang="pt-BR", layout_mode="fixed")
 
-    report = review_pdf_epub(pdf_path, epub_path)
-    assert report["coverage_text_percent"] >= 50
+    with zipfile.ZipFile(epub_path) as zf:
+        names = zf.namelist()
+    assert any(name.endswith("fixed_pages/page_1.jpg") for name in names)
+    assert not any(name.endswith(".png") for name in names)
+    assert review_pdf_epub(pdf_path, epub_path)["coverage_text_percent"] >= 50
+
+
+def test_fixed_layout_epub_stores_page_images_uncompressed(fixed_sample):
+    _, epub_path, _, _ = fixed_sample
+
+    with zipfile.ZipFile(epub_path) as zf:
+        infos = zf.infolist()
+    assert infos[0].filename == "mimetype"
+    assert infos[0].compress_type == zipfile.ZIP_STORED
+    by_suffix = {info.filename.rsplit(".", 1)[-1]: info.compress_type for info in infos}
+    assert by_suffix["png"] == zipfile.ZIP_STORED
+    assert by_suffix["xhtml"] == zipfile.ZIP_DEFLATED
+
+
+def test_visual_qa_matches_fixed_layout_pages(monkeypatch, fixed_sample):
+    pytest.importorskip("PIL")
+    pytest.importorskip("numpy")
+    pdf_path, epub_path, _, _ = fixed_sample
+    monkeypatch.setenv("PDF2EPUB_QA_VISUAL", "1")
+
+    visual = review_pdf_epub(pdf_path, epub_path)["visual_qa"]
+
+    assert visual["status"] == "ok"
+    assert visual["compared_pages"] == 2
+
+
+@pytest.mark.slow
+def test_visual_qa_compares_pages_in_parallel(monkeypatch, fixed_sample):
+    pytest.importorskip("PIL")
+    pytest.importorskip("numpy")
+    pdf_path, epub_path, _, _ = fixed_sample
+    monkeypatch.setenv("PDF2EPUB_QA_VISUAL", "1")
+    book = epub.read_epub(str(epub_path))
+    serial = qa.build_visual_qa(pdf_path, book)
+
+    monkeypatch.setattr(qa, "VISUAL_PARALLEL_MIN_PAGES", 2)
+    monkeypatch.setenv("PDF2EPUB_QA_REVIEW_WORKERS", "2")
+
+    assert qa.build_visual_qa(pdf_path, book) == serial
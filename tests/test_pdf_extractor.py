@@ -0,0 +1,64 @@
+import fitz
+
+from pdf2epub_qa import pdf_extractor
+from pdf2epub_qa.pdf_extractor import extract_pdf
+
+
+def test_extract_pdf_shares_repeated_image_streams(tmp_path):
+    pdf_path = tmp_path / "logo.pdf"
+
+    pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 8, 8), False)
+    pix.clear_with(200)
+    doc = fitz.open()
+    first = doc.new_page()
+    xref = first.insert_image(fitz.Rect(10, 10, 50, 50), pixmap=pix)
+    second = doc.new_page()
+    second.insert_image(fitz.Rect(10, 10, 50, 50), xref=xref)
+    pdf_path.write_bytes(doc.tobytes())
+    doc.close()
+
+    content = extract_pdf(pdf_path)
+
+    first_image, second_image = (page.images[0] for page in content.pages)
+    assert (first_image.id, second_image.id) == ("p1_img1", "p2_img1")
+    assert first_image.bytes is second_image.bytes
+
+
+def test_extract_pdf_ocrs_only_pages_without_text(tmp_path, monkeypatch):
+    pdf_path = tmp_path / "scan.pdf"
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), "Texto selecionavel")
+    doc.new_page()
+    pdf_path.write_bytes(doc.tobytes())
+    doc.close()
+
+    seen: list[int] = []
+
+    def fake_ocr(page, lang):
+        seen.append(page.number)
+        return "texto via ocr"
+
+    monkeypatch.setenv("PDF2EPUB_QA_ENABLE_OCR", "1")
+    monkeypatch.setenv("PDF2EPUB_QA_OCR_WORKERS", "1")
+    monkeypatch.setattr(pdf_extractor, "_ocr_page", fake_ocr)
+
+    content = pdf_extractor.extract_pdf(pdf_path)
+
+    assert seen == [1]
+    assert "Texto selecionavel" in content.pages[0].text
+    assert content.pages[1].text == "texto via ocr"
+
+
+def test_extract_pdf_leaves_passed_document_open(tmp_path):
+    pdf_path = tmp_path / "shared.pdf"
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), "Pagina compartilhada")
+    pdf_path.write_bytes(doc.tobytes())
+    doc.close()
+
+    with fitz.open(pdf_path) as source_doc:
+        content = extract_pdf(pdf_path, source_doc)
+        assert not source_doc.is_closed
+        assert source_doc.page_count == 1
+
+    assert "Pagina compartilhada" in content.pages[0].text
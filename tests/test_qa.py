@@ -0,0 +1,120 @@
+import difflib
+import random
+
+from pdf2epub_qa import qa
+from pdf2epub_qa.qa import diff_token_opcodes, page_for_index
+
+
+def test_diff_token_opcodes_diffs_words_only_between_aligned_paragraphs():
+    pdf = [("um", "dois"), ("tres", "quatro", "cinco"), ("seis",)]
+    epub = [("titulo",), ("um", "dois"), ("tres", "QUATRO", "cinco"), ("seis",)]
+
+    opcodes = [op for op in diff_token_opcodes(pdf, epub) if op[0] != "equal"]
+
+    # Indel has no substitutions: a changed word is an insertion plus a deletion.
+    assert opcodes == [("insert", 0, 0, 0, 1), ("insert", 3, 3, 4, 5), ("delete", 3, 4, 5, 5)]
+
+
+def test_diff_token_opcodes_bounds_memory_on_a_large_unaligned_gap(monkeypatch):
+    # Same words, different paragraph breaks: nothing aligns and the whole text is one gap,
+    # too large for Indel's quadratic bit matrix.
+    rnd = random.Random(7)
+    tokens = [f"w{rnd.randrange(3000)}" for _ in range(20_000)]
+    edited = list(tokens)
+    edits = rnd.sample(range(len(tokens)), 40)
+    for pos in edits:
+        edited[pos] = "EDIT"
+    pdf = [tuple(tokens[i : i + 60]) for i in range(0, len(tokens), 60)]
+    epub = [tuple(edited[i : i + 45]) for i in range(0, len(edited), 45)]
+    matcher_sizes: list[tuple[int, int]] = []
+
+    class RecordingMatcher(difflib.SequenceMatcher):
+        def __init__(self, isjunk, a, b):
+            matcher_sizes.append((len(a), len(b)))
+            super().__init__(isjunk, a, b)
+
+    monkeypatch.setattr(qa.difflib, "SequenceMatcher", RecordingMatcher)
+
+    opcodes = list(diff_token_opcodes(pdf, epub))
+
+    assert any(len_a * len_b > qa._MAX_INDEL_CELLS for len_a, len_b in matcher_sizes)
+    assert sum(i2 - i1 for tag, i1, i2, _, _ in opcodes if tag == "equal") == len(tokens) - 40
+    assert sum(i2 - i1 for _, i1, i2, _, _ in opcodes) == len(tokens)
+    assert sum(j2 - j1 for _, _, _, j1, j2 in opcodes) == len(edited)
+
+
+def test_diff_token_opcodes_falls_back_to_pages_when_paragraphs_do_not_align(monkeypatch):
+    tokens = [f"w{index}" for index in range(90)]
+    edited = list(tokens)
+    edited[40] = "EDIT"
+    pdf = [tuple(tokens[i : i + 10]) for i in range(0, 90, 10)]
+    epub = [tuple(edited[i : i + 15]) for i in range(0, 90, 15)] + [("extra",) * 5]
+    pdf_ranges = [(1, 0, 30), (2, 30, 60), (3, 60, 90)]
+    epub_ranges = [(1, 0, 30), (2, 30, 60), (3, 60, 90), (9, 90, 95)]
+    gap_sizes: list[tuple[int, int]] = []
+    gap_opcodes = qa._gap_opcodes
+
+    def recording_gap_opcodes(a, b):
+        gap_sizes.append((len(a), len(b)))
+        return gap_opcodes(a, b)
+
+    monkeypatch.setattr(qa, "_gap_opcodes", recording_gap_opcodes)
+
+    opcodes = list(diff_token_opcodes(pdf, epub, pdf_ranges, epub_ranges))
+
+    assert gap_sizes == [(30, 30)] * 3
+    assert [op for op in opcodes if op[0] != "equal"] == [
+        ("insert", 40, 40, 40, 41),
+        ("delete", 40, 41, 41, 41),
+        ("insert", 90, 90, 90, 95),
+    ]
+
+
+def test_build_epub_token_ranges_gives_headings_to_the_next_page():
+    segments = [(None, "Titulo"), (1, "um dois"), (2, "tres"), (None, "Fim")]
+
+    tokens, ranges, paragraphs = qa.build_epub_token_ranges(segments)
+
+    assert tokens == ["titulo", "um", "dois", "tres", "fim"]
+    assert ranges == [(1, 0, 3), (2, 3, 4)]
+    assert paragraphs == [("titulo",), ("um", "dois"), ("tres",), ("fim",)]
+
+
+def test_diff_token_opcodes_identical_text_is_one_equal_run():
+    paragraphs = [("um", "dois"), ("tres",)]
+
+    assert list(diff_token_opcodes(paragraphs, list(paragraphs))) == [("equal", 0, 3, 0, 3)]
+
+
+def test_page_for_index_skips_pages_without_tokens():
+    ranges = [(1, 0, 3), (2, 3, 3), (3, 3, 5)]
+
+    assert [page_for_index(ranges, index) for index in range(6)] == [1, 1, 1, 3, 3, None]
+
+
+def test_page_segments_split_text_at_page_anchors():
+    root = qa.parse_epub_document(
+        b"<html><head><style>p {}</style></head><body><h1>Titulo</h1>"
+        b'<a id="page-1"></a><p>um <!-- nota -->dois</p>'
+        b'<a id="page-2"></a><p>tres</p><script>x()</script></body></html>'
+    )
+
+    segments = [(page, " ".join(text.split())) for page, text in qa._page_segments(root)]
+
+    assert segments == [(None, "Titulo"), (1, "um dois"), (2, "tres")]
+
+
+def test_resolve_epub_href_matches_normpath():
+    cases = [
+        ("text", "fixed_pages/page_1.png"),
+        ("", "page_2.jpg"),
+        ("OEBPS/text", "../fixed_pages/page_3.png"),
+        ("text", "./img\\page_4.png"),
+    ]
+
+    assert [qa._resolve_epub_href(doc_dir, src) for doc_dir, src in cases] == [
+        "text/fixed_pages/page_1.png",
+        "page_2.jpg",
+        "OEBPS/fixed_pages/page_3.png",
+        "text/img/page_4.png",
+    ]
@@ -1,4 +1,12 @@
-from pdf2epub_qa.utils import detect_heading, text_to_paragraphs
+import json
+
+from pdf2epub_qa.utils import (
+    detect_heading,
+    dump_json,
+    text_to_paragraphs,
+    tokenize,
+    write_json,
+)
 
 
 def test_text_to_paragraphs():
@@ -15,3 +23,30 @@ def test_detect_heading():
 def test_detect_heading_non_first_line():
     text = "\n\nCAPITULO 2\nTexto"
     assert detect_heading(text) == "CAPITULO 2"
+
+
+def test_detect_heading_by_keyword_in_mixed_case():
+    text = "texto comum de abertura\nCapítulo 3 - a chegada\nmais texto"
+    assert detect_heading(text) == "Capítulo 3 - a chegada"
+
+
+def test_write_json_overwrites_with_utf8(tmp_path):
+    target = tmp_path / "report.json"
+    target.write_text("conteudo antigo bem mais longo que o novo", encoding="utf-8")
+    write_json(target, {"mensagem": "Conversão ok", "paginas": {1: "ok"}})
+    assert json.loads(target.read_text(encoding="utf-8")) == {
+        "mensagem": "Conversão ok",
+        "paginas": {"1": "ok"},
+    }
+
+
+def test_dump_json_compact_on_request():
+    assert dump_json({"a": [1, 2]}, pretty=False) == b'{"a":[1,2]}'
+    assert dump_json({"a": 1}) == b'{\n  "a": 1\n}'
+
+
+def test_tokenize_returns_a_fresh_list_per_call():
+    tokens = tokenize("Ola  MUNDO d'agua")
+    tokens.append("extra")
+
+    assert tokenize("Ola  MUNDO d'agua") == ["ola", "mundo", "d'agua"]